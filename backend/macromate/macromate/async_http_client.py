@@ -0,0 +1,98 @@
+"""
+Async outbound HTTP client (httpx) for the async views
+
+The async counterpart of http_client.HttpClient, with the same settings:
+1. Connections are kept alive and reused
+2. Every call has a connect/read timeout
+3. 429 and 5xx responses (and connection errors) are retried with exponential backoff
+4. Each host has a cap on how many calls we make to it at the same time
+
+Waiting on an upstream call doesn't hold a thread, so one ASGI worker can have
+hundreds of these in flight.
+"""
+
+import asyncio
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+from django.conf import settings
+
+from .http_client import RETRY_STATUS_CODES
+
+
+class AsyncHttpClient:
+    """httpx.AsyncClient with retries and a per-host concurrency limit"""
+
+    def __init__(
+        self,
+        connect_timeout=3.05,
+        read_timeout=10,
+        max_retries=2,
+        backoff_factor=0.5,
+        max_connections_per_host=10,
+    ):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_connections_per_host = max_connections_per_host
+
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+        )
+        self._semaphores = {}  # host -> asyncio.Semaphore
+
+    def _retry_delay(self, response, attempt):
+        """Seconds to wait before the next attempt (honours Retry-After)"""
+        retry_after = response.headers.get("Retry-After") if response else None
+        if retry_after and retry_after.isdigit():
+            return int(retry_after)
+        return self.backoff_factor * (2**attempt)
+
+    async def get(self, url, params=None, **kwargs):
+        """
+        Send a GET request, retrying rate limits and temporary failures
+        Returns an httpx.Response; raises httpx exceptions like httpx.get()
+        """
+        host = urlsplit(url).netloc
+        semaphore = self._semaphores.setdefault(
+            host, asyncio.Semaphore(self.max_connections_per_host)
+        )
+
+        # Wait here if we already have too many calls in flight to this host
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                is_last_attempt = attempt == self.max_retries
+                try:
+                    response = await self.client.get(url, params=params, **kwargs)
+                except httpx.TransportError:
+                    if is_last_attempt:
+                        raise
+                    response = None
+                else:
+                    if (
+                        is_last_attempt
+                        or response.status_code not in RETRY_STATUS_CODES
+                    ):
+                        return response
+
+                await asyncio.sleep(self._retry_delay(response, attempt))
+
+
+# httpx clients belong to the event loop they were first used on, so keep one per loop
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_http_client():
+    """Return the AsyncHttpClient for the running event loop, configured from settings"""
+    loop = asyncio.get_running_loop()
+
+    if loop not in _clients:
+        _clients[loop] = AsyncHttpClient(
+            connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+            read_timeout=settings.HTTP_READ_TIMEOUT,
+            max_retries=settings.HTTP_MAX_RETRIES,
+            backoff_factor=settings.HTTP_RETRY_BACKOFF,
+            max_connections_per_host=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+        )
+
+    return _clients[loop]
@@ -0,0 +1,54 @@
+"""
+Base class for async (ASGI) API views
+
+DRF's APIView only runs synchronously, so the async endpoints are plain Django
+async views. This base class gives them the same token authentication as
+AuthenticatedAPIView and a couple of small request/response helpers.
+"""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncAuthenticatedView(View):
+    """
+    Async view that requires a valid "Authorization: Token <key>" header
+    Handlers (async def get/post) find the user on request.user.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            # The token lookup is a database query
+            user_auth = await sync_to_async(TokenAuthentication().authenticate)(request)
+        except AuthenticationFailed as e:
+            return JsonResponse({"detail": str(e.detail)}, status=401)
+
+        if user_auth is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=401,
+            )
+
+        request.user = user_auth[0]
+        return await super().dispatch(request, *args, **kwargs)
+
+    def json_body(self, request):
+        """
+        The request's JSON body as a dictionary (empty if there isn't one)
+        Raises: ValueError if the body isn't a JSON object
+        """
+        if not request.body:
+            return {}
+
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            raise ValueError("The JSON body must be an object")
+        return data
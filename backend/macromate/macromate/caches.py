@@ -0,0 +1,16 @@
+"""
+Helpers for the Django cache backend (settings.CACHES)
+
+Some features only work when every worker process sees the same cache entries:
+cross-process single-flight, warm_recipe_cache, and the shared tier of
+meals.cache.TwoTierCache. They check is_shared_cache() before relying on it.
+"""
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_shared_cache(alias="default"):
+    """Whether this cache is shared between processes (not LocMem / dummy)"""
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
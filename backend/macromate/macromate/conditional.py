@@ -0,0 +1,48 @@
+"""
+Conditional GET helpers (ETag / Last-Modified) for API views
+
+Views compute validators from cheap columns (ids and updated_at timestamps) before
+loading the full object. If the client already has that version, they answer
+304 Not Modified without loading or serializing the heavy payload.
+"""
+
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """Build an ETag value from anything that changes when the response changes"""
+    return hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def not_modified(request, etag, last_modified=None):
+    """
+    Check the request's If-None-Match / If-Modified-Since headers
+
+    etag: value from make_etag()
+    last_modified: datetime of the newest data in the response (optional)
+    Returns: a 304 response if the client's copy is current, otherwise None
+    """
+    response = get_conditional_response(
+        request,
+        etag=quote_etag(etag),
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    """Add ETag / Last-Modified headers so the client can revalidate next time"""
+    response.headers["ETag"] = quote_etag(etag)
+    if last_modified:
+        response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
+
+
+def request_variant(request):
+    """The query parameters, so different ?fields=/?view= responses get different ETags"""
+    return sorted(request.query_params.items())
@@ -0,0 +1,103 @@
+"""
+Shared outbound HTTP client for the third-party APIs we call (Spoonacular, USDA)
+
+Every service should make its upstream calls through get_http_client() instead of
+bare requests.get() so that:
+1. Connections are kept alive and reused (one pool per host, no new TLS handshake per call)
+2. Every call has a connect/read timeout, so a stuck upstream can't pin a worker
+3. 429 and 5xx responses are retried with exponential backoff
+4. Each host has a cap on how many calls we make to it at the same time
+"""
+
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Status codes worth retrying: rate limiting and temporary server errors
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class HttpClient:
+    """Thread-safe HTTP client with one keep-alive session per host"""
+
+    def __init__(
+        self,
+        connect_timeout=3.05,
+        read_timeout=10,
+        max_retries=2,
+        backoff_factor=0.5,
+        max_connections_per_host=10,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_connections_per_host = max_connections_per_host
+
+        # host -> (session, semaphore), created the first time we call that host
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host_pool(self, host):
+        """Get (or create) the session and concurrency limit for a host"""
+        with self._lock:
+            if host not in self._hosts:
+                retry = Retry(
+                    total=self.max_retries,
+                    backoff_factor=self.backoff_factor,
+                    status_forcelist=RETRY_STATUS_CODES,
+                    allowed_methods=frozenset(["GET"]),
+                    respect_retry_after_header=True,
+                    # Hand back the last response so callers' raise_for_status() still works
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.max_connections_per_host,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+
+                semaphore = threading.BoundedSemaphore(self.max_connections_per_host)
+                self._hosts[host] = (session, semaphore)
+
+            return self._hosts[host]
+
+    def get(self, url, params=None, **kwargs):
+        """
+        Send a GET request through the pooled session for the url's host
+        Works like requests.get() and raises the same requests exceptions
+        """
+        session, semaphore = self._host_pool(urlsplit(url).netloc)
+        kwargs.setdefault("timeout", self.timeout)
+
+        # Wait here if we already have too many calls in flight to this host
+        with semaphore:
+            return session.get(url, params=params, **kwargs)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Return the process-wide HttpClient, configured from Django settings"""
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient(
+                    connect_timeout=settings.HTTP_CONNECT_TIMEOUT,
+                    read_timeout=settings.HTTP_READ_TIMEOUT,
+                    max_retries=settings.HTTP_MAX_RETRIES,
+                    backoff_factor=settings.HTTP_RETRY_BACKOFF,
+                    max_connections_per_host=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+                )
+
+    return _client
@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -93,6 +93,25 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The suggestion / recipe caches, warm_recipe_cache and cross-process single-flight
+# only reach every worker with a shared backend, e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://localhost:6379/1
+# (or django.core.cache.backends.db.DatabaseCache + `manage.py createcachetable`).
+# The default LocMemCache is per-process, which is only fine for development.
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": config("CACHE_LOCATION", default=""),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -181,3 +200,85 @@ CORS_ALLOW_METHODS = [
 ]
 
 SPOONACULAR_API_KEY = config("SPOONACULAR_API_KEY")
+
+# Meal suggestions
+# Answer suggestion requests from cached Recipe rows when the local pool
+# already has enough matches, and only call Spoonacular to top it up
+MEAL_SUGGESTIONS_LOCAL_FIRST = config(
+    "MEAL_SUGGESTIONS_LOCAL_FIRST", default=True, cast=bool
+)
+# Fetch breakfast/lunch/dinner suggestions in parallel threads
+MEAL_SUGGESTIONS_CONCURRENT = config(
+    "MEAL_SUGGESTIONS_CONCURRENT", default=True, cast=bool
+)
+
+# Outbound HTTP (Spoonacular / USDA) - see macromate/http_client.py
+HTTP_CONNECT_TIMEOUT = config("HTTP_CONNECT_TIMEOUT", default=3.05, cast=float)
+HTTP_READ_TIMEOUT = config("HTTP_READ_TIMEOUT", default=10, cast=float)
+HTTP_MAX_RETRIES = config("HTTP_MAX_RETRIES", default=2, cast=int)
+HTTP_RETRY_BACKOFF = config("HTTP_RETRY_BACKOFF", default=0.5, cast=float)
+HTTP_MAX_CONNECTIONS_PER_HOST = config(
+    "HTTP_MAX_CONNECTIONS_PER_HOST", default=10, cast=int
+)
+
+# Suggestion result cache - macro windows are snapped to these bucket sizes so
+# users with similar goals share cached results (see MealPlannerService.snap_targets)
+SUGGESTION_BUCKET_CALORIES = config("SUGGESTION_BUCKET_CALORIES", default=25, cast=int)
+SUGGESTION_BUCKET_GRAMS = config("SUGGESTION_BUCKET_GRAMS", default=5, cast=int)
+SUGGESTION_CACHE_TTL = config("SUGGESTION_CACHE_TTL", default=3600, cast=int)
+SUGGESTION_CACHE_MAX_ENTRIES = config(
+    "SUGGESTION_CACHE_MAX_ENTRIES", default=1024, cast=int
+)
+
+# Single-flight request coalescing (see macromate/singleflight.py)
+# Cross-process mode uses the Django cache as a lock, so it needs a shared cache
+# backend (see CACHES above) - startup fails if it is on with LocMemCache
+SINGLEFLIGHT_CROSS_PROCESS = config(
+    "SINGLEFLIGHT_CROSS_PROCESS", default=False, cast=bool
+)
+SINGLEFLIGHT_LOCK_TIMEOUT = config("SINGLEFLIGHT_LOCK_TIMEOUT", default=30, cast=int)
+SINGLEFLIGHT_RESULT_TTL = config("SINGLEFLIGHT_RESULT_TTL", default=10, cast=int)
+
+# Recipe detail cache (RecipeDetailView) - keyed by recipe ID and updated_at, so a
+# rewritten recipe is never served stale from any process's cache
+RECIPE_CACHE_TTL = config("RECIPE_CACHE_TTL", default=86400, cast=int)
+RECIPE_CACHE_LOCAL_TTL = config("RECIPE_CACHE_LOCAL_TTL", default=60, cast=int)
+RECIPE_CACHE_MAX_ENTRIES = config("RECIPE_CACHE_MAX_ENTRIES", default=2048, cast=int)
+
+# Recipe freshness (meals/freshness.py) - cached recipes older than this many
+# seconds are refreshed in the background while the stale row is still served
+RECIPE_STALE_AFTER = config("RECIPE_STALE_AFTER", default=7 * 24 * 3600, cast=int)
+RECIPE_STALE_WHILE_REVALIDATE = config(
+    "RECIPE_STALE_WHILE_REVALIDATE", default=True, cast=bool
+)
+RECIPE_REFRESH_BATCH_SIZE = config("RECIPE_REFRESH_BATCH_SIZE", default=50, cast=int)
+RECIPE_REFRESH_WORKERS = config("RECIPE_REFRESH_WORKERS", default=2, cast=int)
+# A recipe whose background refresh failed isn't retried for this many seconds
+# (doubled for each failure in a row)
+RECIPE_REFRESH_RETRY_AFTER = config(
+    "RECIPE_REFRESH_RETRY_AFTER", default=5 * 60, cast=int
+)
+
+# Full recipe information for shopping lists - fetched with informationBulk in
+# chunks of this many recipes, and stored on the Recipe row (Recipe.information)
+# for RECIPE_INFORMATION_TTL seconds before it is fetched again
+RECIPE_INFORMATION_BULK_SIZE = config(
+    "RECIPE_INFORMATION_BULK_SIZE", default=50, cast=int
+)
+RECIPE_INFORMATION_TTL = config(
+    "RECIPE_INFORMATION_TTL", default=7 * 24 * 3600, cast=int
+)
+
+# Ingredient prices for shopping lists come from the offline price catalog
+# (`manage.py import_price_catalog`). Searching USDA for ingredients the catalog
+# doesn't cover is opt-in (USDA_PRICE_LOOKUP); those results are kept in
+# meal_planning.models.IngredientPrice for INGREDIENT_PRICE_TTL seconds, and at
+# most USDA_MAX_CONCURRENCY USDA lookups run at the same time
+USDA_PRICE_LOOKUP = config("USDA_PRICE_LOOKUP", default=False, cast=bool)
+INGREDIENT_PRICE_TTL = config("INGREDIENT_PRICE_TTL", default=30 * 24 * 3600, cast=int)
+USDA_MAX_CONCURRENCY = config("USDA_MAX_CONCURRENCY", default=4, cast=int)
+
+# Macro-fit ranking (see meals/ranking.py)
+# Weights for calories, proteins, fats, carbohydrates - higher means that macro
+# counts more when ranking how closely a recipe hits its meal targets
+MACRO_FIT_WEIGHTS = config("MACRO_FIT_WEIGHTS", default="1,1,1,1", cast=Csv(float))
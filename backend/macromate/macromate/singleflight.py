@@ -0,0 +1,167 @@
+"""
+Request coalescing ("single-flight") for expensive upstream calls
+
+When several requests need the same upstream result at the same time, only the
+first caller for a key actually runs the fetch. Everyone else who asks for that
+key while it is in flight waits and gets the same result (or the same error).
+
+Within a worker process this uses threads and events. With cross_process=True the
+Django cache is also used as a lock, so concurrent callers in other processes wait
+for the winner's result instead of fetching it again. That needs a shared cache
+backend (settings.CACHES) - with the per-process LocMemCache it is refused.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+
+from .caches import is_shared_cache
+
+
+class _Call:
+    """One in-flight fetch that other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run at most one fetch per key at a time and share its result"""
+
+    def __init__(
+        self, cross_process=False, lock_timeout=30, result_ttl=10, poll_interval=0.05
+    ):
+        """
+        cross_process: also coordinate with other processes through the Django cache
+        lock_timeout: seconds before a cross-process lock is considered abandoned
+        result_ttl: seconds the winner's result stays in the cache for waiters
+        poll_interval: seconds between checks while waiting on another process
+        Raises: ImproperlyConfigured if cross_process is on without a shared cache
+        """
+        if cross_process and not is_shared_cache():
+            # Every process would get its own "lock", so nothing would be coalesced
+            raise ImproperlyConfigured(
+                "SINGLEFLIGHT_CROSS_PROCESS needs a shared cache backend "
+                "(set CACHE_BACKEND / CACHE_LOCATION), not LocMemCache"
+            )
+
+        self.cross_process = cross_process
+        self.lock_timeout = lock_timeout
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+
+        self._calls = {}  # key -> _Call
+        self._lock = threading.Lock()
+
+    def do(self, key, fetch):
+        """
+        Return fetch() for this key, sharing one call between concurrent callers
+
+        key: string identifying the upstream request (without API keys)
+        fetch: function with no arguments that does the actual work
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+
+        # Someone in this process is already fetching it - wait for them
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            if self.cross_process:
+                call.result = self._do_shared(key, fetch)
+            else:
+                call.result = fetch()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def _do_shared(self, key, fetch):
+        """Use the Django cache as a lock so only one process runs the fetch"""
+        # Hash the key so it is always a valid cache key (memcached has limits)
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        lock_key = f"singleflight:lock:{digest}"
+        result_key = f"singleflight:result:{digest}"
+
+        # cache.add() only succeeds for the first process
+        if cache.add(lock_key, 1, self.lock_timeout):
+            try:
+                result = fetch()
+                cache.set(result_key, result, self.result_ttl)
+                return result
+            finally:
+                cache.delete(lock_key)
+
+        # Another process has the lock - poll for the result it stores
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+
+            result = cache.get(result_key)
+            if result is not None:
+                return result
+
+            # Lock released without a result (the fetch failed) - stop waiting
+            if cache.get(lock_key) is None:
+                break
+
+        # Do the fetch ourselves rather than fail the request
+        return fetch()
+
+
+class AsyncSingleFlight:
+    """
+    Single-flight for coroutines (the async views)
+
+    Callers on the same event loop share one task per key. Only coordinates
+    within the event loop - there is no cross-process mode here.
+    """
+
+    def __init__(self):
+        self._tasks = {}  # (event loop, key) -> asyncio.Task
+
+    async def do(self, key, fetch):
+        """
+        Return await fetch() for this key, sharing one call between concurrent callers
+
+        key: string identifying the upstream request (without API keys)
+        fetch: async function with no arguments that does the actual work
+        """
+        task_key = (asyncio.get_running_loop(), key)
+
+        task = self._tasks.get(task_key)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._tasks[task_key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(task_key, None))
+
+        # shield() so one caller disconnecting doesn't cancel the fetch for everyone
+        return await asyncio.shield(task)
+
+
+# Shared instance for all upstream calls (keys are namespaced by the caller)
+single_flight = SingleFlight(
+    cross_process=settings.SINGLEFLIGHT_CROSS_PROCESS,
+    lock_timeout=settings.SINGLEFLIGHT_LOCK_TIMEOUT,
+    result_ttl=settings.SINGLEFLIGHT_RESULT_TTL,
+)
+async_single_flight = AsyncSingleFlight()
@@ -0,0 +1,68 @@
+import threading
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from .singleflight import SingleFlight
+
+
+class SingleFlightTests(SimpleTestCase):
+    """Concurrent callers with the same key share one fetch"""
+
+    def run_callers(self, fetch, callers=8):
+        single_flight = SingleFlight()
+        results = []
+        errors = []
+
+        def call():
+            try:
+                results.append(single_flight.do("key", fetch))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        return results, errors
+
+    def blocking_fetch(self, calls, outcome):
+        """A fetch that holds the key until every caller has had time to queue up"""
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return outcome()
+
+        return fetch
+
+    def test_fetch_runs_once_for_all_callers(self):
+        calls = []
+        results, errors = self.run_callers(
+            self.blocking_fetch(calls, lambda: {"recipes": [1, 2]})
+        )
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [{"recipes": [1, 2]}] * 8)
+
+    def test_error_reaches_every_caller(self):
+        calls = []
+
+        def fail():
+            raise ValueError("upstream down")
+
+        results, errors = self.run_callers(self.blocking_fetch(calls, fail))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 8)
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
+
+    def test_cross_process_needs_a_shared_cache(self):
+        # The test settings use the default LocMemCache
+        with self.assertRaises(ImproperlyConfigured):
+            SingleFlight(cross_process=True)
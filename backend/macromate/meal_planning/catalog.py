@@ -0,0 +1,100 @@
+"""
+Offline ingredient price catalog (PriceCatalogEntry)
+
+Shopping-list costs come from this table instead of a USDA search per
+ingredient. A catalog is a CSV or JSON file of foods with a retail price, for
+example exported USDA food-at-home data:
+- CSV: a header row with "name" and "price" columns ("unit" and
+  "description" are optional)
+- JSON: a list of {"name", "price", "unit", "description"} objects, or a
+  {name: price} object
+
+DEFAULT_CATALOG_PATH is bundled with the app and is loaded by a migration, so
+a fresh database always has prices.
+"""
+
+import csv
+import json
+from pathlib import Path
+
+from django.utils import timezone
+
+DEFAULT_CATALOG_PATH = Path(__file__).resolve().parent / "data" / "price_catalog.json"
+
+
+def read_price_catalog(path):
+    """
+    Read a catalog file
+
+    path: .csv or .json file
+    Returns: list of {"name", "price", "unit", "description"} dictionaries
+    Raises: ValueError if a row has no name or an invalid price
+    """
+    path = Path(path)
+
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with path.open(encoding="utf-8") as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = [{"name": name, "price": price} for name, price in rows.items()]
+
+    entries = {}  # name -> entry (a later row with the same name wins)
+    for number, row in enumerate(rows, start=1):
+        name = " ".join(str(row.get("name") or "").lower().split())[:255]
+        if not name:
+            raise ValueError(f"Row {number} has no name")
+
+        try:
+            price = float(row.get("price"))
+        except (TypeError, ValueError):
+            raise ValueError(f"Row {number} ({name}) has an invalid price")
+
+        entries[name] = {
+            "name": name,
+            "price": price,
+            "unit": (row.get("unit") or "")[:50],
+            "description": (row.get("description") or "")[:255],
+        }
+
+    return list(entries.values())
+
+
+def import_price_catalog(entries, source="", replace=False, model=None):
+    """
+    Load catalog entries into PriceCatalogEntry with one bulk upsert
+
+    entries: list of dictionaries from read_price_catalog()
+    source: where the entries came from, stored on each row
+    replace: remove entries that aren't in this catalog
+    model: the model to write to (migrations pass their historical model)
+    Returns: number of entries imported
+    """
+    if model is None:
+        from .models import PriceCatalogEntry as model
+
+    imported_at = timezone.now()
+    model.objects.bulk_create(
+        [
+            model(
+                name=entry["name"],
+                price=entry["price"],
+                unit=entry["unit"],
+                description=entry["description"],
+                source=source[:255],
+                imported_at=imported_at,
+            )
+            for entry in entries
+        ],
+        update_conflicts=True,
+        unique_fields=["name"],
+        update_fields=["price", "unit", "description", "source", "imported_at"],
+    )
+
+    if replace:
+        # Every row this import wrote has this imported_at, so anything older is gone
+        model.objects.filter(imported_at__lt=imported_at).delete()
+
+    return len(entries)
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from meal_planning.catalog import (
+    DEFAULT_CATALOG_PATH,
+    import_price_catalog,
+    read_price_catalog,
+)
+
+
+class Command(BaseCommand):
+    """
+    Load an ingredient price catalog into PriceCatalogEntry
+    Usage: python manage.py import_price_catalog [path/to/catalog.csv] [--replace]
+
+    Without a path, the catalog bundled with the app is (re)loaded. Entries are
+    upserted by name. An ingredient uses the entry with its exact name, or else
+    the longest entry name it contains ("cream cheese spread" -> "cream cheese",
+    not "cream"), so the order of the file doesn't matter.
+    """
+
+    help = "Import an ingredient price catalog (CSV or JSON) for shopping-list costs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default=str(DEFAULT_CATALOG_PATH),
+            help="Catalog file (.csv or .json); defaults to the bundled catalog",
+        )
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Remove existing entries that aren't in this catalog",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+
+        try:
+            entries = read_price_catalog(path)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {path}: {e}")
+
+        if not entries:
+            raise CommandError(f"{path} has no entries")
+
+        imported = import_price_catalog(
+            entries, source=Path(path).name, replace=options["replace"]
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} catalog entries"))
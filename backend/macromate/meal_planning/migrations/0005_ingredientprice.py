@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("meal_planning", "0004_delete_favoriterecipe"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngredientPrice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("price_per_unit", models.FloatField(blank=True, null=True)),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[("usda", "USDA FoodData Central")], max_length=20
+                    ),
+                ),
+                ("fdc_id", models.IntegerField(blank=True, null=True)),
+                ("description", models.CharField(blank=True, max_length=255)),
+                ("fetched_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("meal_planning", "0005_ingredientprice"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PriceCatalogEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("price", models.FloatField()),
+                ("unit", models.CharField(blank=True, max_length=50)),
+                ("description", models.CharField(blank=True, max_length=255)),
+                ("source", models.CharField(blank=True, max_length=255)),
+                ("imported_at", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+from meal_planning.catalog import (
+    DEFAULT_CATALOG_PATH,
+    import_price_catalog,
+    read_price_catalog,
+)
+
+
+def load_default_price_catalog(apps, schema_editor):
+    """Load the bundled price catalog so a fresh database has prices"""
+    import_price_catalog(
+        read_price_catalog(DEFAULT_CATALOG_PATH),
+        source=DEFAULT_CATALOG_PATH.name,
+        model=apps.get_model("meal_planning", "PriceCatalogEntry"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("meal_planning", "0006_pricecatalogentry"),
+    ]
+
+    operations = [
+        migrations.RunPython(load_default_price_catalog, migrations.RunPython.noop),
+    ]
@@ -59,3 +59,49 @@ class ShoppingList(models.Model):
         self.is_completed = True
         self.completed_at = timezone.now()
         self.save()
+
+
+class IngredientPrice(models.Model):
+    """
+    Price resolved for an ingredient name, so each name is only looked up once
+    (see ShoppingListService._resolve_usda_prices)
+    """
+
+    SOURCES = [
+        ("usda", "USDA FoodData Central"),
+    ]
+
+    name = models.CharField(max_length=255, unique=True)  # Lowercased ingredient name
+    # Price per typical package; None means there was no match (use manual estimation)
+    price_per_unit = models.FloatField(null=True, blank=True)
+
+    # Where the price came from
+    source = models.CharField(max_length=20, choices=SOURCES)
+    fdc_id = models.IntegerField(null=True, blank=True)  # Matched USDA food, if any
+    description = models.CharField(max_length=255, blank=True)  # Its description
+    fetched_at = models.DateTimeField()  # When the price was resolved
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.price_per_unit} ({self.source})"
+
+
+class PriceCatalogEntry(models.Model):
+    """
+    One food in the offline price catalog, loaded with
+    `manage.py import_price_catalog` (see meal_planning/catalog.py)
+    """
+
+    # Lowercased keyword matched against ingredient names, e.g. "chicken"
+    name = models.CharField(max_length=255, unique=True)
+    price = models.FloatField()  # Retail price per unit
+    unit = models.CharField(max_length=50, blank=True)  # e.g. "lb", "gallon", "dozen"
+    description = models.CharField(max_length=255, blank=True)
+
+    source = models.CharField(max_length=255, blank=True)  # Catalog file it came from
+    imported_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}: {self.price} per {self.unit or 'unit'}"
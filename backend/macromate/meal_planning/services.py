@@ -1,10 +1,25 @@
+import asyncio
+import re
 import requests
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
 from django.core.cache import cache
+from django.utils import timezone
 from decouple import config
 from typing import Dict, List
-from .models import ShoppingList
+from .models import IngredientPrice, PriceCatalogEntry, ShoppingList
+from meals.information import (
+    information_payload,
+    save_recipe_information,
+    stored_recipe_information,
+)
+from meals.ingredients import recipe_ingredient_information
 from meals.models import Recipe, MealPlan
+from meals.services import MEAL_TYPES
 from datetime import date, timedelta
+from macromate.http_client import get_http_client
+from macromate.singleflight import async_single_flight, single_flight
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,9 +31,11 @@ class ShoppingListService:
         self.usda_api_key = config("USDA_API_KEY")
         self.base_url = "https://api.spoonacular.com"
         self.usda_base_url = "https://api.nal.usda.gov/fdc/v1"
+        self.http = get_http_client()  # Shared keep-alive client with timeouts/retries
+        self._catalog = None  # Price catalog names, loaded on first use
 
-    def _fetch_full_recipe_info(self, recipe_id):
-        """Fetch detailed recipe information including ingredients with pricing"""
+    def _recipe_info_request(self, recipe_id):
+        """URL and query parameters for a recipe's full information"""
         url = f"{self.base_url}/recipes/{recipe_id}/information"
         params = {
             "apiKey": self.api_key,
@@ -26,14 +43,209 @@ class ShoppingListService:
             "addWinePairing": False,
             "addTasteData": False,
         }
+        return url, params
 
-        try:
-            response = requests.get(url, params=params)
+    def _fetch_full_recipe_info(self, recipe_id):
+        """Fetch detailed recipe information including ingredients with pricing"""
+        url, params = self._recipe_info_request(recipe_id)
+
+        def fetch():
+            try:
+                response = self.http.get(url, params=params)
+                response.raise_for_status()
+                return response.json()
+            except requests.RequestException as e:
+                logger.error(f"Error fetching recipe {recipe_id}: {e}")
+                return None
+
+        # Concurrent requests for the same recipe share one upstream call
+        return single_flight.do(f"recipeInformation:{recipe_id}", fetch)
+
+    async def _afetch_full_recipe_info(self, recipe_id):
+        """Async version of _fetch_full_recipe_info"""
+        # httpx is only needed by the async routes, so it's imported here
+        import httpx
+
+        from macromate.async_http_client import get_async_http_client
+
+        url, params = self._recipe_info_request(recipe_id)
+
+        async def fetch():
+            try:
+                response = await get_async_http_client().get(url, params=params)
+                response.raise_for_status()
+                return response.json()
+            except httpx.HTTPError as e:
+                logger.error(f"Error fetching recipe {recipe_id}: {e}")
+                return None
+
+        # Concurrent requests for the same recipe share one upstream call
+        return await async_single_flight.do(f"recipeInformation:{recipe_id}", fetch)
+
+    def _fetch_full_recipe_infos(self, recipe_ids):
+        """
+        Full information for many recipes, with as few upstream calls as possible
+
+        1. Recipes whose information is stored on the Recipe row (and within
+           RECIPE_INFORMATION_TTL) need no upstream call at all
+        2. The rest are fetched with informationBulk, RECIPE_INFORMATION_BULK_SIZE at a time
+        3. If a chunk fails (or leaves recipes out), those recipes are fetched one
+           by one, concurrently
+
+        recipe_ids: list of Spoonacular recipe IDs
+        Returns: {recipe_id: recipe information, or None if it couldn't be fetched}
+        """
+        full_recipes, missing_ids = self._stored_recipe_infos(recipe_ids)
+
+        fetched = {}
+        for chunk in self._chunks(missing_ids):
+            try:
+                fetched.update(self._fetch_information_bulk(chunk))
+            except requests.RequestException as e:
+                logger.warning(f"informationBulk failed, fetching one by one: {e}")
+
+            leftover_ids = [
+                recipe_id for recipe_id in chunk if recipe_id not in fetched
+            ]
+            if leftover_ids:
+                with ThreadPoolExecutor(
+                    max_workers=min(
+                        len(leftover_ids), settings.HTTP_MAX_CONNECTIONS_PER_HOST
+                    )
+                ) as executor:
+                    fetched.update(
+                        zip(
+                            leftover_ids,
+                            executor.map(self._fetch_full_recipe_info, leftover_ids),
+                        )
+                    )
+
+        self._store_recipe_infos(fetched)
+        full_recipes.update(fetched)
+        full_recipes.update(self._fallback_recipe_infos(full_recipes))
+        return full_recipes
+
+    async def _afetch_full_recipe_infos(self, recipe_ids):
+        """Async version of _fetch_full_recipe_infos"""
+        import httpx
+
+        full_recipes, missing_ids = await sync_to_async(self._stored_recipe_infos)(
+            recipe_ids
+        )
+
+        async def fetch_chunk(chunk):
+            try:
+                chunk_recipes = await self._afetch_information_bulk(chunk)
+            except httpx.HTTPError as e:
+                logger.warning(f"informationBulk failed, fetching one by one: {e}")
+                chunk_recipes = {}
+
+            leftover_ids = [
+                recipe_id for recipe_id in chunk if recipe_id not in chunk_recipes
+            ]
+            results = await asyncio.gather(
+                *(
+                    self._afetch_full_recipe_info(recipe_id)
+                    for recipe_id in leftover_ids
+                )
+            )
+            chunk_recipes.update(zip(leftover_ids, results))
+            return chunk_recipes
+
+        fetched = {}
+        for chunk_recipes in await asyncio.gather(
+            *(fetch_chunk(chunk) for chunk in self._chunks(missing_ids))
+        ):
+            fetched.update(chunk_recipes)
+
+        await sync_to_async(self._store_recipe_infos)(fetched)
+        full_recipes.update(fetched)
+        full_recipes.update(
+            await sync_to_async(self._fallback_recipe_infos)(full_recipes)
+        )
+        return full_recipes
+
+    def _fetch_information_bulk(self, recipe_ids):
+        """One informationBulk call. Returns: {recipe_id: recipe information}"""
+        url, params = self._information_bulk_request(recipe_ids)
+
+        def fetch():
+            response = self.http.get(url, params=params)
             response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            logger.error(f"Error fetching recipe {recipe_id}: {e}")
-            return None
+            return {recipe["id"]: recipe for recipe in response.json()}
+
+        # Concurrent requests for the same recipes share one upstream call
+        return single_flight.do(f"informationBulk:{params['ids']}", fetch)
+
+    async def _afetch_information_bulk(self, recipe_ids):
+        """Async version of _fetch_information_bulk"""
+        from macromate.async_http_client import get_async_http_client
+
+        url, params = self._information_bulk_request(recipe_ids)
+
+        async def fetch():
+            response = await get_async_http_client().get(url, params=params)
+            response.raise_for_status()
+            return {recipe["id"]: recipe for recipe in response.json()}
+
+        return dict(
+            await async_single_flight.do(f"informationBulk:{params['ids']}", fetch)
+        )
+
+    def _information_bulk_request(self, recipe_ids):
+        """URL and query parameters for an informationBulk call"""
+        url = f"{self.base_url}/recipes/informationBulk"
+        params = {
+            "apiKey": self.api_key,
+            "ids": ",".join(str(recipe_id) for recipe_id in recipe_ids),
+            "includeNutrition": False,  # We don't need nutrition for shopping lists
+        }
+        return url, params
+
+    def _chunks(self, recipe_ids):
+        """Split IDs into informationBulk-sized chunks"""
+        size = settings.RECIPE_INFORMATION_BULK_SIZE
+        return [
+            recipe_ids[start : start + size]
+            for start in range(0, len(recipe_ids), size)
+        ]
+
+    def _stored_recipe_infos(self, recipe_ids):
+        """
+        Look recipes up in what we've stored on the Recipe rows
+        Returns: ({recipe_id: information}, missing_ids)
+        """
+        found = stored_recipe_information(recipe_ids)
+        missing_ids = [recipe_id for recipe_id in recipe_ids if recipe_id not in found]
+        return found, missing_ids
+
+    def _fallback_recipe_infos(self, full_recipes):
+        """
+        For recipes whose information couldn't be fetched, rebuild what the list
+        needs from their RecipeIngredient rows instead of leaving them out
+        """
+        failed_ids = [
+            recipe_id
+            for recipe_id, recipe_info in full_recipes.items()
+            if recipe_info is None
+        ]
+        if not failed_ids:
+            return {}
+        return recipe_ingredient_information(failed_ids)
+
+    def _store_recipe_infos(self, recipe_infos):
+        """Store fetched recipe information so the next list doesn't refetch it"""
+        try:
+            save_recipe_information(
+                {
+                    recipe_id: information_payload(recipe_info)
+                    for recipe_id, recipe_info in recipe_infos.items()
+                    if recipe_info is not None
+                }
+            )
+        except Exception as e:
+            # The list can still be built from what we fetched
+            logger.error(f"Error storing recipe information: {e}")
 
     def generate_shopping_list_for_meal_plans(self, account, start_date, end_date=None):
         """
@@ -42,34 +254,133 @@ class ShoppingListService:
         if end_date is None:
             end_date = start_date
 
-        # Get all meal plans for the date range from your meals app
-        # Your MealPlan has breakfast, lunch, dinner fields instead of a single recipe field
-        meal_plans = MealPlan.objects.filter(
-            account=account, date__gte=start_date, date__lte=end_date
+        # Get all meal plans for the date range (and their recipes) in one query
+        meal_plans = list(self._meal_plan_rows(account, start_date, end_date))
+
+        if not meal_plans:
+            return None
+
+        # Fetch the full information of every recipe in the plans at once
+        recipe_ids = list(
+            dict.fromkeys(
+                recipe["spoonacular_id"]
+                for meal_plan in meal_plans
+                for meal_type, recipe in self._meal_plan_recipes(meal_plan)
+            )
         )
+        full_recipes = self._fetch_full_recipe_infos(recipe_ids)
 
-        if not meal_plans.exists():
+        recipe_details = self._build_recipe_details(meal_plans, full_recipes)
+
+        if not recipe_details:
+            return None
+
+        # Generate consolidated shopping list
+        shopping_data = self._create_shopping_list(recipe_details)
+
+        return self._save_shopping_list(account, start_date, end_date, shopping_data)
+
+    async def agenerate_shopping_list_for_meal_plans(
+        self, account, start_date, end_date=None
+    ):
+        """
+        Async version of generate_shopping_list_for_meal_plans for the ASGI views
+
+        The recipe information calls to Spoonacular are awaited together
+        instead of one after another.
+        """
+        if end_date is None:
+            end_date = start_date
+
+        meal_plans = [
+            meal_plan
+            async for meal_plan in self._meal_plan_rows(account, start_date, end_date)
+        ]
+
+        if not meal_plans:
             return None
 
-        # Collect all recipes from breakfast, lunch, dinner fields
+        recipe_ids = list(
+            dict.fromkeys(
+                recipe["spoonacular_id"]
+                for meal_plan in meal_plans
+                for meal_type, recipe in self._meal_plan_recipes(meal_plan)
+            )
+        )
+        full_recipes = await self._afetch_full_recipe_infos(recipe_ids)
+
+        recipe_details = self._build_recipe_details(meal_plans, full_recipes)
+
+        if not recipe_details:
+            return None
+
+        # Resolve every USDA price up front so building the list is pure computation
+        usda_prices = await self._aresolve_usda_prices(
+            self._usda_price_names(recipe_details)
+        )
+        shopping_data = self._create_shopping_list(recipe_details, usda_prices)
+
+        return await sync_to_async(self._save_shopping_list)(
+            account, start_date, end_date, shopping_data
+        )
+
+    def _meal_plan_rows(self, account, start_date, end_date):
+        """
+        The account's meal plans in a date range, as dictionaries
+
+        The three recipes are joined in and only the columns the shopping list
+        uses are selected, so this is one query however long the range is.
+        """
+        fields = ["id", "date"]
+        for meal_type in MEAL_TYPES:
+            fields += [f"{meal_type}__spoonacular_id", f"{meal_type}__title"]
+
+        return (
+            MealPlan.objects.filter(
+                account=account, date__gte=start_date, date__lte=end_date
+            )
+            .order_by("date")
+            .values(*fields)
+        )
+
+    def _meal_plan_recipes(self, meal_plan):
+        """
+        The (meal type, recipe) pairs a meal plan has filled in
+
+        meal_plan: one dictionary from _meal_plan_rows()
+        Returns: list of (meal_type, {"spoonacular_id": ..., "title": ...})
+        """
+        # Check each meal type and collect recipes
+        meal_recipes = []
+        for meal_type in MEAL_TYPES:
+            spoonacular_id = meal_plan[f"{meal_type}__spoonacular_id"]
+            if spoonacular_id is not None:
+                meal_recipes.append(
+                    (
+                        meal_type,
+                        {
+                            "spoonacular_id": spoonacular_id,
+                            "title": meal_plan[f"{meal_type}__title"],
+                        },
+                    )
+                )
+        return meal_recipes
+
+    def _build_recipe_details(self, meal_plans, full_recipes):
+        """
+        Group the meal plans by recipe
+
+        meal_plans: dictionaries from _meal_plan_rows()
+        full_recipes: {spoonacular_id: full recipe information, or None if the fetch failed}
+        Returns: {spoonacular_id: {"recipe_data": ..., "meal_plans": [...]}}
+        """
         recipe_details = {}
-        recipes_to_fetch = []
 
         for meal_plan in meal_plans:
-            # Check each meal type and collect recipes
-            meal_recipes = []
-            if meal_plan.breakfast:
-                meal_recipes.append(("breakfast", meal_plan.breakfast))
-            if meal_plan.lunch:
-                meal_recipes.append(("lunch", meal_plan.lunch))
-            if meal_plan.dinner:
-                meal_recipes.append(("dinner", meal_plan.dinner))
-
-            # Add to our collection
-            for meal_type, recipe in meal_recipes:
-                recipe_id = recipe.spoonacular_id
+            for meal_type, recipe in self._meal_plan_recipes(meal_plan):
+                recipe_id = recipe["spoonacular_id"]
                 if recipe_id not in recipe_details:
-                    full_recipe = self._fetch_full_recipe_info(recipe_id)
+                    full_recipe = full_recipes.get(recipe_id)
                     if full_recipe:
                         recipe_details[recipe_id] = {
                             "recipe_data": full_recipe,
@@ -87,12 +398,10 @@ class ShoppingListService:
                         }
                     )
 
-        if not recipe_details:
-            return None
-
-        # Generate consolidated shopping list
-        shopping_data = self._create_shopping_list(recipe_details)
+        return recipe_details
 
+    def _save_shopping_list(self, account, start_date, end_date, shopping_data):
+        """Create or update the ShoppingList for this date range"""
         # Create or update ShoppingList object
         shopping_list, created = ShoppingList.objects.get_or_create(
             account=account,
@@ -123,10 +432,18 @@ class ShoppingListService:
 
         return shopping_list
 
-    def _create_shopping_list(self, recipe_details):
+    def _create_shopping_list(self, recipe_details, usda_prices=None):
         """
         Create consolidated shopping list from multiple recipes with detailed cost breakdowns
+
+        usda_prices: USDA prices already resolved for this list; if not given,
+                     every ingredient that needs one is resolved here in one pass
         """
+        if usda_prices is None:
+            usda_prices = self._resolve_usda_prices(
+                self._usda_price_names(recipe_details)
+            )
+
         consolidated_ingredients = {}
         total_cost = 0
         meal_breakdown = {}
@@ -144,7 +461,7 @@ class ShoppingListService:
             if not first_meal_entry:
                 continue
 
-            recipe_title = first_meal_entry["recipe"].title
+            recipe_title = first_meal_entry["recipe"]["title"]
             recipe_ingredients_cost = []
             recipe_total_cost = 0
 
@@ -165,7 +482,10 @@ class ShoppingListService:
                 }
 
                 estimated_cost = self._estimate_ingredient_cost(
-                    ingredient_data, full_amount, ingredient.get("unit", "")
+                    ingredient_data,
+                    full_amount,
+                    ingredient.get("unit", ""),
+                    usda_prices,
                 )
 
                 # Per-serving calculations
@@ -287,19 +607,53 @@ class ShoppingListService:
         unit = ingredient.get("unit", "").lower().strip()
         return f"{name}_{unit}"
 
-    def _estimate_ingredient_cost(self, ingredient_data, amount, unit):
+    def _estimate_ingredient_cost(
+        self, ingredient_data, amount, unit, usda_prices=None
+    ):
         """
         Estimate ingredient cost using multiple data sources in order of preference:
         1. Spoonacular pricing data
-        2. USDA Food Data API
+        2. Offline USDA price catalog (plus USDA Food Data API searches if
+           USDA_PRICE_LOOKUP is on)
         3. Manual estimation fallback
+
+        usda_prices: {ingredient name: USDA price} from _resolve_usda_prices(); if
+                     not given, this ingredient is resolved on its own
         """
-        ingredient_name = (
+        ingredient_name = self._ingredient_name(ingredient_data)
+
+        local_price = self._local_ingredient_cost(ingredient_data, amount)
+        if local_price is not None:
+            return local_price
+
+        # 2. Try the USDA price catalog
+        usda_price = self._get_usda_food_price(
+            ingredient_name, amount, unit, usda_prices
+        )
+        if usda_price is not None and usda_price > 0:
+            logger.info(f"Using USDA price for {ingredient_name}: ${usda_price}")
+            return usda_price
+
+        # 3. Fallback to manual estimation
+        manual_price = self._improved_cost_estimation(ingredient_name, amount, unit)
+        logger.info(f"Using manual estimation for {ingredient_name}: ${manual_price}")
+        return manual_price
+
+    def _ingredient_name(self, ingredient_data):
+        """Lowercased name of an ingredient (dictionary or plain string)"""
+        return (
             ingredient_data.get("name", "").lower()
             if isinstance(ingredient_data, dict)
             else str(ingredient_data).lower()
         )
 
+    def _local_ingredient_cost(self, ingredient_data, amount):
+        """
+        Cost we can work out without a price lookup (free/cheap items and
+        Spoonacular's own price data), or None if the ingredient needs one
+        """
+        ingredient_name = self._ingredient_name(ingredient_data)
+
         # Skip cost calculation for items that should be free/very cheap
         free_items = ["water", "ice", "air"]
         if any(free_item in ingredient_name for free_item in free_items):
@@ -330,16 +684,7 @@ class ShoppingListService:
                 )
                 return spoonacular_price
 
-        # 2. Try USDA Food Data API
-        usda_price = self._get_usda_food_price(ingredient_name, amount, unit)
-        if usda_price is not None and usda_price > 0:
-            logger.info(f"Using USDA price for {ingredient_name}: ${usda_price}")
-            return usda_price
-
-        # 3. Fallback to manual estimation
-        manual_price = self._improved_cost_estimation(ingredient_name, amount, unit)
-        logger.info(f"Using manual estimation for {ingredient_name}: ${manual_price}")
-        return manual_price
+        return None
 
     def get_shopping_list_for_week(self, account, start_date=None):
         """Generate shopping list for a full week"""
@@ -472,96 +817,321 @@ class ShoppingListService:
             # Default: assume it's a fraction of the base unit
             return base_cost * 0.1 * amount
 
-    def _get_usda_food_price(self, ingredient_name, amount, unit):
+    def _get_usda_food_price(self, ingredient_name, amount, unit, usda_prices=None):
         """
-        Get pricing from USDA Food Data API - direct search
+        Cost of an ingredient from its USDA price, or None if there isn't one
         """
         # Clean ingredient name for search
         ingredient_name_clean = ingredient_name.lower().strip()
 
-        # Check cache first
-        cache_key = f"usda_price_{ingredient_name_clean.replace(' ', '_')}"
-        cached_price = cache.get(cache_key)
-        if cached_price is not None:
-            return self._calculate_usda_cost(
-                cached_price, amount, unit, ingredient_name_clean
+        if usda_prices is None:
+            usda_prices = self._resolve_usda_prices([ingredient_name_clean])
+
+        price_per_unit = usda_prices.get(ingredient_name_clean)
+        if price_per_unit is None:
+            return None  # No results found, fall back to manual estimation
+
+        return self._calculate_usda_cost(
+            price_per_unit, amount, unit, ingredient_name_clean
+        )
+
+    def _usda_price_names(self, recipe_details):
+        """Unique (cleaned) names of the ingredients in a list that need a USDA price"""
+        names = {}
+        for data in recipe_details.values():
+            for ingredient in data["recipe_data"].get("extendedIngredients", []):
+                amount = ingredient.get("amount", 0)
+                if self._local_ingredient_cost(ingredient, amount) is None:
+                    names[self._ingredient_name(ingredient).strip()] = None
+        return list(names)
+
+    def _usda_price_cache_key(self, ingredient_name):
+        return f"usda_price_{ingredient_name.replace(' ', '_')}"
+
+    def _resolve_usda_prices(self, ingredient_names):
+        """
+        Prices for many ingredient names in one pass
+
+        1. The offline price catalog (PriceCatalogEntry) - no network at all
+        2. Only if USDA_PRICE_LOOKUP is on, the names the catalog doesn't cover
+           are looked up through _lookup_usda_prices()
+
+        ingredient_names: list of cleaned ingredient names
+        Returns: {name: price per unit, or None if there's no price}
+        """
+        prices, missing_names = self._catalog_prices(ingredient_names)
+
+        if settings.USDA_PRICE_LOOKUP and missing_names:
+            prices.update(self._lookup_usda_prices(missing_names))
+        return prices
+
+    async def _aresolve_usda_prices(self, ingredient_names):
+        """Async version of _resolve_usda_prices"""
+        prices, missing_names = await sync_to_async(self._catalog_prices)(
+            ingredient_names
+        )
+
+        if settings.USDA_PRICE_LOOKUP and missing_names:
+            prices.update(await self._alookup_usda_prices(missing_names))
+        return prices
+
+    def _lookup_usda_prices(self, ingredient_names):
+        """
+        USDA prices for ingredient names the catalog doesn't cover
+
+        1. Prices we've stored in IngredientPrice (within INGREDIENT_PRICE_TTL)
+        2. Prices in the Django cache
+        3. USDA searches for the rest, USDA_MAX_CONCURRENCY at a time
+        New results are written back to both, with where they came from.
+
+        ingredient_names: list of cleaned ingredient names
+        Returns: {name: price per unit, or None if USDA had no match}
+        """
+        prices, missing_names = self._stored_usda_prices(ingredient_names)
+
+        looked_up = {}
+        if missing_names:
+            with ThreadPoolExecutor(
+                max_workers=min(len(missing_names), settings.USDA_MAX_CONCURRENCY)
+            ) as executor:
+                for name, result in zip(
+                    missing_names, executor.map(self._lookup_usda_price, missing_names)
+                ):
+                    if result is not None:
+                        looked_up[name] = result
+
+        self._save_usda_prices(looked_up)
+        prices.update(
+            (name, result["price_per_unit"]) for name, result in looked_up.items()
+        )
+        return prices
+
+    async def _alookup_usda_prices(self, ingredient_names):
+        """Async version of _lookup_usda_prices"""
+        prices, missing_names = await sync_to_async(self._stored_usda_prices)(
+            ingredient_names
+        )
+
+        semaphore = asyncio.Semaphore(settings.USDA_MAX_CONCURRENCY)
+
+        async def lookup(name):
+            async with semaphore:
+                return await self._alookup_usda_price(name)
+
+        results = await asyncio.gather(*(lookup(name) for name in missing_names))
+        looked_up = {
+            name: result
+            for name, result in zip(missing_names, results)
+            if result is not None
+        }
+
+        await sync_to_async(self._save_usda_prices)(looked_up)
+        prices.update(
+            (name, result["price_per_unit"]) for name, result in looked_up.items()
+        )
+        return prices
+
+    def _catalog_keywords(self):
+        """
+        Catalog entries as (pattern, price), longest name first, for matching
+        ingredient names that aren't in the catalog exactly
+        Loaded once per service (one query), and only if something needs it.
+        """
+        if self._catalog is None:
+            entries = sorted(
+                PriceCatalogEntry.objects.values_list("name", "price"),
+                key=lambda entry: (-len(entry[0]), entry[0]),
             )
+            # Whole words only (a plural "s"/"es" is allowed), so "eggplant"
+            # doesn't match "egg" and "butternut squash" doesn't match "butter"
+            self._catalog = [
+                (re.compile(rf"\b{re.escape(name)}(?:e?s)?\b"), price)
+                for name, price in entries
+            ]
+        return self._catalog
+
+    def _catalog_keyword_price(self, ingredient_name):
+        """
+        Price of the longest catalog name found as whole words in the ingredient's
+        name ("cream cheese spread" matches "cream cheese" before "cream")
+        """
+        for pattern, price in self._catalog_keywords():
+            if pattern.search(ingredient_name):
+                return price
+        return None
 
-        # Search USDA API directly with the ingredient name
-        try:
-            search_url = f"{self.usda_base_url}/foods/search"
-            params = {
-                "query": ingredient_name_clean,
-                "pageSize": 3,
-                "api_key": self.usda_api_key,
-            }
+    def _catalog_prices(self, ingredient_names):
+        """
+        Look ingredient names up in the price catalog
 
-            response = requests.get(search_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+        1. Exact names in one indexed name__in query
+        2. Only the names that miss are matched against the catalog's names
 
-            if not data.get("foods"):
-                return None  # No results found, fall back to manual estimation
+        Returns: ({name: price per unit}, missing_names)
+        """
+        if not ingredient_names:
+            return {}, []
 
-            # Use our estimated prices based on successful search
-            estimated_price = self._get_usda_estimated_price(
-                ingredient_name_clean, ingredient_name_clean
+        prices = dict(
+            PriceCatalogEntry.objects.filter(name__in=ingredient_names).values_list(
+                "name", "price"
             )
+        )
+
+        missing_names = []
+        for name in ingredient_names:
+            if name in prices:
+                continue
+            price = self._catalog_keyword_price(name)
+            if price is None:
+                missing_names.append(name)
+            else:
+                prices[name] = price
+        return prices, missing_names
 
-            # Cache the price for 24 hours
-            cache.set(cache_key, estimated_price, 86400)
+    def _stored_usda_prices(self, ingredient_names):
+        """
+        Look prices up in IngredientPrice, then the Django cache
+        Returns: ({name: price per unit or None}, missing_names)
+        """
+        # Load the catalog names here, in a thread that may use the database -
+        # _usda_price_result() needs them in the lookup threads / event loop
+        self._catalog_keywords()
+
+        cutoff = timezone.now() - timedelta(seconds=settings.INGREDIENT_PRICE_TTL)
+        prices = dict(
+            IngredientPrice.objects.filter(
+                name__in=ingredient_names, fetched_at__gte=cutoff
+            ).values_list("name", "price_per_unit")
+        )
 
-            return self._calculate_usda_cost(
-                estimated_price, amount, unit, ingredient_name_clean
+        uncached_names = [name for name in ingredient_names if name not in prices]
+        cached = cache.get_many(
+            [self._usda_price_cache_key(name) for name in uncached_names]
+        )
+
+        # Cache hits are only served, not written back - the cache doesn't know
+        # their provenance, and re-saving them would keep resetting fetched_at
+        missing_names = []
+        for name in uncached_names:
+            cached_price = cached.get(self._usda_price_cache_key(name))
+            if cached_price is None:
+                missing_names.append(name)
+            else:
+                prices[name] = cached_price
+        return prices, missing_names
+
+    def _save_usda_prices(self, results):
+        """
+        Write resolved prices back to IngredientPrice (and the Django cache)
+
+        results: {name: {"price_per_unit": ..., "fdc_id": ..., "description": ...}}
+        """
+        if not results:
+            return
+
+        fetched_at = timezone.now()
+        try:
+            IngredientPrice.objects.bulk_create(
+                [
+                    IngredientPrice(
+                        name=name[:255],
+                        price_per_unit=result["price_per_unit"],
+                        source="usda",
+                        fdc_id=result.get("fdc_id"),
+                        description=(result.get("description") or "")[:255],
+                        fetched_at=fetched_at,
+                    )
+                    for name, result in results.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["name"],
+                update_fields=[
+                    "price_per_unit",
+                    "source",
+                    "fdc_id",
+                    "description",
+                    "fetched_at",
+                    "updated_at",
+                ],
             )
+        except Exception as e:
+            # The list can still be priced from what we resolved
+            logger.error(f"Error saving ingredient prices: {e}")
+
+        # Cache the price for 24 hours
+        cache.set_many(
+            {
+                self._usda_price_cache_key(name): result["price_per_unit"]
+                for name, result in results.items()
+                if result["price_per_unit"] is not None
+            },
+            86400,
+        )
+
+    def _usda_search_request(self, ingredient_name):
+        """URL and query parameters for a USDA food search"""
+        search_url = f"{self.usda_base_url}/foods/search"
+        params = {
+            "query": ingredient_name,
+            "pageSize": 3,
+            "api_key": self.usda_api_key,
+        }
+        return search_url, params
+
+    def _usda_price_result(self, ingredient_name, data):
+        """Turn a USDA search response into a price result"""
+        if not data.get("foods"):
+            # No results found, fall back to manual estimation
+            return {"price_per_unit": None}
+
+        # Use our estimated prices based on successful search
+        food = data["foods"][0]
+        return {
+            "price_per_unit": self._get_usda_estimated_price(
+                ingredient_name, ingredient_name
+            ),
+            "fdc_id": food.get("fdcId"),
+            "description": food.get("description", ""),
+        }
+
+    def _lookup_usda_price(self, ingredient_name):
+        """
+        Search USDA for one ingredient
+        Returns: price result dictionary, or None if the search failed
+        """
+        search_url, params = self._usda_search_request(ingredient_name)
+        try:
+            response = self.http.get(search_url, params=params)
+            response.raise_for_status()
+            return self._usda_price_result(ingredient_name, response.json())
+        except Exception as e:
+            logger.warning(f"USDA API error for {ingredient_name}: {e}")
+            return None
+
+    async def _alookup_usda_price(self, ingredient_name):
+        """Async version of _lookup_usda_price"""
+        from macromate.async_http_client import get_async_http_client
 
+        search_url, params = self._usda_search_request(ingredient_name)
+        try:
+            response = await get_async_http_client().get(search_url, params=params)
+            response.raise_for_status()
+            return self._usda_price_result(ingredient_name, response.json())
         except Exception as e:
             logger.warning(f"USDA API error for {ingredient_name}: {e}")
             return None
 
     def _get_usda_estimated_price(self, usda_food_name, ingredient_name):
         """
-        Get estimated retail price based on USDA food cost data
-        These are based on USDA's Cost of Food at Home reports (updated periodically)
-        """
-        # Prices per pound (as of 2024 USDA estimates)
-        usda_price_estimates = {
-            # Proteins (per pound)
-            "chicken": 4.32,
-            "beef": 7.14,
-            "turkey": 5.89,
-            "salmon": 13.45,
-            "fish": 10.20,
-            "egg": 2.88,  # per dozen
-            # Dairy
-            "milk": 3.59,  # per gallon
-            "cream": 8.50,
-            "butter": 5.12,
-            "cheese": 5.98,
-            "yogurt": 5.45,
-            # Vegetables (per pound)
-            "onion": 1.28,
-            "garlic": 3.45,
-            "tomato": 2.87,
-            "pepper": 3.21,
-            "carrot": 1.15,
-            "celery": 1.67,
-            "potato": 1.33,
-            "broccoli": 2.45,
-            "spinach": 4.12,
-            # Grains & Pantry (per pound)
-            "rice": 1.89,
-            "pasta": 1.34,
-            "bread": 1.89,
-            "flour": 0.89,
-            "sugar": 0.95,
-            "oil": 3.45,
-        }
-
-        # Find matching price category
-        for category, price in usda_price_estimates.items():
-            if category in ingredient_name.lower():
-                return price
+        Get estimated retail price from the offline price catalog, which holds
+        USDA's Cost of Food at Home data (see meal_planning/catalog.py)
+        """
+        # The keyword list is already loaded by _catalog_prices(), so this runs
+        # in the USDA lookup threads without touching the database
+        price = self._catalog_keyword_price(ingredient_name.lower())
+        if price is not None:
+            return price
 
         # Default price if no match found
         return 2.50
@@ -1,3 +1,283 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+
+from accounts.models import Account
+from meals.models import Ingredient, MealPlan, Recipe, RecipeIngredient
+from .models import PriceCatalogEntry
+from .services import ShoppingListService
+
+
+class ShoppingListQueryCountTests(TestCase):
+    """Generating a shopping list shouldn't cost more queries for a longer range"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create_user(
+            "shopper@example.com", "password", first_name="Shop", last_name="Per"
+        )
+
+        # Recipes with stored information, so no upstream calls are needed
+        recipes = [
+            Recipe.objects.create(
+                spoonacular_id=spoonacular_id,
+                title=f"Recipe {spoonacular_id}",
+                ready_in_minutes=10,
+                calories=500,
+                proteins=30,
+                fats=15,
+                carbohydrates=60,
+                information={
+                    "id": spoonacular_id,
+                    "servings": 2,
+                    "extendedIngredients": [
+                        {"name": "egg", "amount": 2, "unit": "", "aisle": "Dairy"},
+                        {"name": "rice", "amount": 1, "unit": "cup", "aisle": "Pasta"},
+                    ],
+                },
+                information_fetched_at=timezone.now(),
+            )
+            for spoonacular_id in range(1, 7)
+        ]
+
+        cls.start_date = date(2025, 1, 1)
+        MealPlan.objects.bulk_create(
+            MealPlan(
+                account=cls.account,
+                date=cls.start_date + timedelta(days=day),
+                breakfast=recipes[day % 6],
+                lunch=recipes[(day + 1) % 6],
+                dinner=recipes[(day + 2) % 6],
+            )
+            for day in range(60)
+        )
+
+    def setUp(self):
+        self.service = ShoppingListService()
+        # Pricing isn't what's being measured here (and mustn't call USDA)
+        patcher = mock.patch.object(
+            ShoppingListService, "_resolve_usda_prices", return_value={}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def generate(self, days):
+        return self.service.generate_shopping_list_for_meal_plans(
+            self.account,
+            self.start_date,
+            self.start_date + timedelta(days=days - 1),
+        )
+
+    def test_meal_plan_scan_is_one_query(self):
+        with self.assertNumQueries(1):
+            meal_plans = list(
+                self.service._meal_plan_rows(
+                    self.account, self.start_date, self.start_date + timedelta(days=59)
+                )
+            )
+            recipes = [
+                recipe
+                for meal_plan in meal_plans
+                for meal_type, recipe in self.service._meal_plan_recipes(meal_plan)
+            ]
+        self.assertEqual(len(recipes), 180)
+
+    def test_query_count_does_not_grow_with_range(self):
+        for days in [7, 60]:
+            # 1. meal plans with their recipes, 2. stored recipe information,
+            # 3-6. saving the list (update_or_create: SELECT, then an INSERT
+            # inside a savepoint)
+            with self.subTest(days=days), self.assertNumQueries(6):
+                self.assertIsNotNone(self.generate(days))
+
+
+class RecipeInformationFallbackTests(TestCase):
+    """Recipes whose information can't be fetched are priced from their stored rows"""
+
+    def test_failed_fetch_uses_recipe_ingredient_rows(self):
+        recipe = Recipe.objects.create(
+            spoonacular_id=501,
+            title="Omelette",
+            ready_in_minutes=10,
+            servings=2,
+            calories=300,
+            proteins=20,
+            fats=20,
+            carbohydrates=5,
+        )
+        egg = Ingredient.objects.create(spoonacular_id=1123, name="egg", aisle="Dairy")
+        RecipeIngredient.objects.create(
+            recipe=recipe, ingredient=egg, amount=3, unit="", original="3 eggs"
+        )
+
+        service = ShoppingListService()
+        with mock.patch.object(
+            ShoppingListService, "_fetch_information_bulk", return_value={}
+        ), mock.patch.object(
+            ShoppingListService, "_fetch_full_recipe_info", return_value=None
+        ):
+            full_recipes = service._fetch_full_recipe_infos([501, 502])
+
+        self.assertIsNone(full_recipes[502])
+        self.assertEqual(full_recipes[501]["servings"], 2)
+        self.assertEqual(
+            full_recipes[501]["extendedIngredients"],
+            [
+                {
+                    "id": 1123,
+                    "name": "egg",
+                    "aisle": "Dairy",
+                    "amount": 3,
+                    "unit": "",
+                    "original": "3 eggs",
+                }
+            ],
+        )
+
+
+class AsyncShoppingListViewTests(TestCase):
+    """Bad request bodies are 400s on the async endpoints, like the sync ones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        account = Account.objects.create_user(
+            "async@example.com", "password", first_name="As", last_name="Ync"
+        )
+        cls.token = Token.objects.create(user=account)
+
+    def post(self, url, body):
+        return self.client.post(
+            url,
+            body,
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Token {self.token.key}",
+        )
+
+    def test_non_object_body(self):
+        for url in [
+            "/api/v1/meal-planning/shopping-list/generate/async/",
+            "/api/v1/meal-planning/shopping-list/weekly/async/",
+        ]:
+            response = self.post(url, "[1, 2]")
+            self.assertEqual(response.status_code, 400)
+
+    def test_non_string_dates(self):
+        response = self.post(
+            "/api/v1/meal-planning/shopping-list/generate/async/",
+            {"start_date": 123},
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.post(
+            "/api/v1/meal-planning/shopping-list/generate/async/",
+            {"start_date": "2025-01-01", "end_date": ["2025-01-07"]},
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.post(
+            "/api/v1/meal-planning/shopping-list/weekly/async/", {"week_start": 123}
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class ShoppingListPricingTests(TestCase):
+    """Every ingredient in a list is priced with one batched lookup"""
+
+    def test_ingredients_are_priced_in_one_batch(self):
+        account = Account.objects.create_user(
+            "pricing@example.com", "password", first_name="Pri", last_name="Cing"
+        )
+        names = [f"test item {number}" for number in range(1, 6)]
+        PriceCatalogEntry.objects.bulk_create(
+            PriceCatalogEntry(name=name, price=1.25, imported_at=timezone.now())
+            for name in names
+        )
+        recipe = Recipe.objects.create(
+            spoonacular_id=701,
+            title="Stew",
+            ready_in_minutes=30,
+            calories=600,
+            proteins=30,
+            fats=20,
+            carbohydrates=70,
+            information={
+                "id": 701,
+                "servings": 2,
+                "extendedIngredients": [
+                    {"name": name, "amount": 1, "unit": "cup", "aisle": "Pantry"}
+                    for name in names
+                ],
+            },
+            information_fetched_at=timezone.now(),
+        )
+        MealPlan.objects.create(account=account, date=date(2025, 2, 1), dinner=recipe)
+
+        token = Token.objects.create(user=account)
+        with mock.patch.object(
+            ShoppingListService,
+            "_resolve_usda_prices",
+            autospec=True,
+            side_effect=ShoppingListService._resolve_usda_prices,
+        ) as resolve, CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/v1/meal-planning/shopping-list/generate/",
+                {"start_date": "2025-02-01"},
+                HTTP_AUTHORIZATION=f"Token {token.key}",
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(resolve.call_count, 1)
+        self.assertCountEqual(resolve.call_args.args[1], names)
+        catalog_queries = [
+            query
+            for query in queries
+            if "meal_planning_pricecatalogentry" in query["sql"]
+        ]
+        self.assertEqual(len(catalog_queries), 1)
+
+
+class CatalogMatchingTests(TestCase):
+    """Ingredient names that aren't in the catalog match its names as whole words"""
+
+    def setUp(self):
+        PriceCatalogEntry.objects.all().delete()
+        PriceCatalogEntry.objects.bulk_create(
+            PriceCatalogEntry(name=name, price=price, imported_at=timezone.now())
+            for name, price in [
+                ("egg", 0.3),
+                ("butter", 4.0),
+                ("cream", 2.0),
+                ("cream cheese", 3.0),
+                ("tomato", 0.8),
+            ]
+        )
+
+    def test_whole_word_matches(self):
+        prices, missing_names = ShoppingListService()._catalog_prices(
+            [
+                "egg",
+                "large eggs",
+                "cream cheese spread",
+                "cherry tomatoes",
+                "eggplant",
+                "butternut squash",
+            ]
+        )
 
-# Create your tests here.
+        self.assertEqual(
+            prices,
+            {
+                "egg": 0.3,
+                "large eggs": 0.3,
+                "cream cheese spread": 3.0,
+                "cherry tomatoes": 0.8,
+            },
+        )
+        self.assertEqual(missing_names, ["eggplant", "butternut squash"])
@@ -4,6 +4,8 @@ from .views import (
     ShoppingListView,
     ShoppingListDetailView,
     WeeklyShoppingListView,
+    ShoppingListGenerateAsyncView,
+    WeeklyShoppingListAsyncView,
 )
 
 urlpatterns = [
@@ -16,6 +18,11 @@ urlpatterns = [
         ShoppingListView.as_view(),
         name="shopping-list-generate",
     ),
+    path(
+        "shopping-list/generate/async/",
+        ShoppingListGenerateAsyncView.as_view(),
+        name="shopping-list-generate-async",
+    ),
     path(
         "shopping-list/<int:shopping_list_id>/",
         ShoppingListDetailView.as_view(),
@@ -31,4 +38,9 @@ urlpatterns = [
         WeeklyShoppingListView.as_view(),
         name="weekly-shopping-list",
     ),
+    path(
+        "shopping-list/weekly/async/",
+        WeeklyShoppingListAsyncView.as_view(),
+        name="weekly-shopping-list-async",
+    ),
 ]
@@ -4,6 +4,7 @@ from rest_framework.views import APIView
 from rest_framework import status as s
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
+from django.http import JsonResponse
 from datetime import date, datetime, timedelta
 from .models import MacroGoal, ShoppingList
 from meals.models import MealPlan
@@ -12,6 +13,8 @@ from .serializers import (
     ShoppingListSerializer,
 )
 from .services import ShoppingListService
+from macromate.async_views import AsyncAuthenticatedView
+from macromate.conditional import make_etag, not_modified, set_validators
 
 
 class AuthenticatedAPIView(APIView):
@@ -109,11 +112,18 @@ class ShoppingListView(AuthenticatedAPIView):
             end_date = start_date
 
         try:
-            shopping_list = ShoppingList.objects.get(
-                account=request.user, start_date=start_date, end_date=end_date
-            )
+            # Check the client's cached copy before loading the JSON columns
+            list_id, updated_at = ShoppingList.objects.values_list(
+                "id", "updated_at"
+            ).get(account=request.user, start_date=start_date, end_date=end_date)
+            etag = make_etag(list_id, updated_at)
+            cached_response = not_modified(request, etag, updated_at)
+            if cached_response is not None:
+                return cached_response
+
+            shopping_list = ShoppingList.objects.get(id=list_id)
             serializer = ShoppingListSerializer(shopping_list)
-            return Response(serializer.data)
+            return set_validators(Response(serializer.data), etag, updated_at)
         except ShoppingList.DoesNotExist:
             return Response(
                 {"error": "No shopping list found for the specified date range"},
@@ -242,3 +252,105 @@ class WeeklyShoppingListView(AuthenticatedAPIView):
                 {"error": f"Error generating weekly shopping list: {str(e)}"},
                 status=s.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+class ShoppingListGenerateAsyncView(AsyncAuthenticatedView):
+    """
+    Async (ASGI) version of POST shopping-list/generate/
+
+    Same body and response. The Spoonacular recipe calls are awaited
+    together, so the request doesn't hold a worker thread while it waits.
+    """
+
+    async def post(self, request):
+        """Generate a new shopping list"""
+        try:
+            data = self.json_body(request)
+        except ValueError:
+            return JsonResponse(
+                {"error": "Invalid JSON body"}, status=s.HTTP_400_BAD_REQUEST
+            )
+
+        start_date = data.get("start_date")
+        end_date = data.get("end_date", start_date)
+
+        if not start_date:
+            return JsonResponse(
+                {"error": "start_date is required"}, status=s.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+            end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            # TypeError: a non-string date in the JSON body, e.g. 123
+            return JsonResponse(
+                {"error": "Invalid date format. Use YYYY-MM-DD"},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        return await generate_shopping_list_response(
+            request.user,
+            start_date,
+            end_date,
+            "No meal plans found for the specified date range",
+            "Error generating shopping list",
+        )
+
+
+class WeeklyShoppingListAsyncView(AsyncAuthenticatedView):
+    """Async (ASGI) version of WeeklyShoppingListView"""
+
+    async def post(self, request):
+        """Generate a weekly shopping list"""
+        try:
+            week_start = self.json_body(request).get("week_start")
+        except ValueError:
+            return JsonResponse(
+                {"error": "Invalid JSON body"}, status=s.HTTP_400_BAD_REQUEST
+            )
+
+        if not week_start:
+            # Default to current week
+            today = date.today()
+            week_start = today - timedelta(days=today.weekday())
+        else:
+            try:
+                week_start = datetime.strptime(week_start, "%Y-%m-%d").date()
+            except (TypeError, ValueError):
+                return JsonResponse(
+                    {"error": "Invalid date format. Use YYYY-MM-DD"},
+                    status=s.HTTP_400_BAD_REQUEST,
+                )
+
+        return await generate_shopping_list_response(
+            request.user,
+            week_start,
+            week_start + timedelta(days=6),
+            "No meal plans found for the specified week",
+            "Error generating weekly shopping list",
+        )
+
+
+async def generate_shopping_list_response(
+    account, start_date, end_date, not_found_message, error_message
+):
+    """Generate a shopping list with the async service and build the JSON response"""
+    try:
+        service = ShoppingListService()
+        shopping_list = await service.agenerate_shopping_list_for_meal_plans(
+            account, start_date, end_date
+        )
+
+        if shopping_list:
+            serializer = ShoppingListSerializer(shopping_list)
+            return JsonResponse(serializer.data, status=s.HTTP_201_CREATED)
+        else:
+            return JsonResponse(
+                {"error": not_found_message}, status=s.HTTP_404_NOT_FOUND
+            )
+    except Exception as e:
+        return JsonResponse(
+            {"error": f"{error_message}: {str(e)}"},
+            status=s.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
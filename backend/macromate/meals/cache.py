@@ -0,0 +1,137 @@
+"""
+In-process caches used by the meal suggestion engine
+
+LRUCache is a small thread-safe cache with a TTL and least-recently-used eviction.
+TwoTierCache puts an LRUCache in front of the Django cache backend, so hot keys are
+served from process memory and every worker still shares the same backing entries.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class LRUCache:
+    """Bounded, thread-safe cache with per-entry expiry"""
+
+    def __init__(self, max_entries=1024, ttl=300):
+        """
+        max_entries: how many keys to keep before evicting the least recently used
+        ttl: seconds an entry stays valid
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value, or default if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+
+            # Mark as most recently used
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting the least recently used entries if we're full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a key if it is cached"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove everything"""
+        with self._lock:
+            self._entries.clear()
+
+
+class TwoTierCache:
+    """Per-process LRUCache in front of the shared Django cache backend"""
+
+    def __init__(self, prefix, max_entries=1024, local_ttl=60, shared_ttl=3600):
+        """
+        prefix: namespace for keys in the Django cache
+        max_entries: size of the per-process LRU
+        local_ttl: seconds an entry lives in process memory
+        shared_ttl: seconds an entry lives in the Django cache
+        """
+        self.prefix = prefix
+        self.shared_ttl = shared_ttl
+        self.local = LRUCache(max_entries=max_entries, ttl=local_ttl)
+
+    def _shared_key(self, key):
+        return f"{self.prefix}:{key}"
+
+    def get(self, key):
+        """Return the cached value or None, checking process memory first"""
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        value = cache.get(self._shared_key(key))
+        if value is not None:
+            self.local.set(key, value)
+        return value
+
+    def set(self, key, value):
+        """Store a value in both tiers"""
+        self.local.set(key, value)
+        cache.set(self._shared_key(key), value, self.shared_ttl)
+
+    def delete(self, key):
+        """Remove a key from both tiers"""
+        self.local.delete(key)
+        cache.delete(self._shared_key(key))
+
+    def delete_many(self, keys):
+        """Remove several keys from both tiers with one shared-cache call"""
+        for key in keys:
+            self.local.delete(key)
+        cache.delete_many([self._shared_key(key) for key in keys])
+
+
+def recipe_cache_key(recipe_id, updated_at):
+    """
+    recipe_cache key for one version of a recipe
+
+    updated_at moves on every rewrite, so once a row changes no process can serve
+    its old detail - whatever its local tier (or a per-process backend) still holds.
+    """
+    return f"{recipe_id}:{updated_at.timestamp()}"
+
+
+# Recipe IDs for each (meal type, snapped macro window) - see MealPlannerService
+suggestion_cache = TwoTierCache(
+    "suggestions",
+    max_entries=settings.SUGGESTION_CACHE_MAX_ENTRIES,
+    local_ttl=settings.SUGGESTION_CACHE_TTL,
+    shared_ttl=settings.SUGGESTION_CACHE_TTL,
+)
+
+# Serialized recipe detail by recipe_cache_key() - see RecipeDetailView
+recipe_cache = TwoTierCache(
+    "recipes",
+    max_entries=settings.RECIPE_CACHE_MAX_ENTRIES,
+    local_ttl=settings.RECIPE_CACHE_LOCAL_TTL,
+    shared_ttl=settings.RECIPE_CACHE_TTL,
+)
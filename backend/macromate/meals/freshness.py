@@ -0,0 +1,213 @@
+"""
+Freshness tracking and background refresh for cached Recipe rows
+
+Every cached recipe records when it was last pulled from Spoonacular (fetched_at)
+and a hash of its parsed content (content_hash). Rows older than RECIPE_STALE_AFTER
+are stale:
+1. Reads still serve the stale row straight away, and queue a background refresh
+   for it (stale-while-revalidate)
+2. `manage.py refresh_stale_recipes` re-pulls stale rows in batches with
+   informationBulk
+Recipes whose background refresh failed aren't queued again until a backoff of
+RECIPE_REFRESH_RETRY_AFTER seconds (doubling on each failure) has passed, so an
+erroring or rate-limiting Spoonacular isn't asked again on every read.
+A refresh that returns the same content only moves fetched_at forward, so the row
+(and its updated_at / ETags / cached detail) isn't rewritten.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from decouple import config
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .information import information_payload, save_recipe_information
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+INFORMATION_BULK_URL = "https://api.spoonacular.com/recipes/informationBulk"
+
+
+def content_hash(recipe_info):
+    """Fingerprint of a parsed recipe (dictionary from MealPlannerService._parse_recipe)"""
+    payload = json.dumps(recipe_info, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def stale_cutoff():
+    """Recipes fetched before this time are stale"""
+    return timezone.now() - timedelta(seconds=settings.RECIPE_STALE_AFTER)
+
+
+def is_stale(fetched_at):
+    """Whether a recipe with this fetched_at should be refreshed"""
+    return fetched_at is None or fetched_at < stale_cutoff()
+
+
+def stale_recipes():
+    """Stale recipes, never-fetched and oldest first"""
+    return Recipe.objects.filter(
+        Q(fetched_at__isnull=True) | Q(fetched_at__lt=stale_cutoff())
+    ).order_by(F("fetched_at").asc(nulls_first=True), "id")
+
+
+def refresh_recipes(spoonacular_ids):
+    """
+    Re-pull recipes from Spoonacular with one informationBulk call and save them
+
+    Each recipe keeps the meal type it was cached under.
+    spoonacular_ids: list of Spoonacular IDs (up to RECIPE_REFRESH_BATCH_SIZE)
+    Returns: dictionary of {spoonacular_id: Recipe} for the recipes that came back
+    """
+    # Imported here because services uses this module
+    from meal_planning.models import MacroGoal
+
+    from .services import MealPlannerService
+
+    meal_types = dict(
+        Recipe.objects.filter(spoonacular_id__in=spoonacular_ids).values_list(
+            "spoonacular_id", "meal_type"
+        )
+    )
+    if not meal_types:
+        return {}
+
+    # Parsing and saving recipes doesn't depend on the goal, so an empty one will do
+    planner = MealPlannerService(
+        MacroGoal(calories=0, proteins=0, fats=0, carbohydrates=0)
+    )
+
+    response = planner.http.get(
+        INFORMATION_BULK_URL,
+        params={
+            "apiKey": config("SPOONACULAR_API_KEY"),
+            "ids": ",".join(str(spoonacular_id) for spoonacular_id in meal_types),
+            "includeNutrition": True,
+        },
+    )
+    response.raise_for_status()
+
+    recipe_infos = []
+    information = {}
+    for recipe_data in response.json():
+        # informationBulk returns the full recipe, so the shopping list copy comes free
+        information[recipe_data.get("id")] = information_payload(recipe_data)
+        try:
+            recipe_infos.append(
+                planner._parse_recipe(
+                    recipe_data, meal_types.get(recipe_data["id"], "")
+                )
+            )
+        except Exception as e:
+            logger.error(f"Error parsing refreshed recipe {recipe_data.get('id')}: {e}")
+
+    missing = len(meal_types) - len(recipe_infos)
+    if missing:
+        logger.warning(f"{missing} recipes did not come back from informationBulk")
+
+    if not recipe_infos:
+        return {}
+
+    recipes = planner._bulk_upsert_recipes(recipe_infos)
+    save_recipe_information(information, recipes)
+    return recipes
+
+
+class BackgroundRefresher:
+    """Refreshes stale recipes in worker threads, never the same recipe twice at once"""
+
+    # Longest backoff is retry_after * 2 ** MAX_BACKOFF_DOUBLINGS
+    MAX_BACKOFF_DOUBLINGS = 4
+
+    def __init__(self, max_workers=2, batch_size=50, retry_after=300):
+        """
+        max_workers: refreshes running at the same time
+        batch_size: recipes per informationBulk call
+        retry_after: seconds before a recipe whose refresh failed can be queued
+                     again (doubled for each failure in a row)
+        """
+        self.batch_size = batch_size
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="recipe-refresh"
+        )
+        self._in_flight = set()  # Spoonacular IDs queued or being refreshed
+        self._retry_after = {}  # Spoonacular ID -> (monotonic retry time, failures)
+        self._lock = threading.Lock()
+
+    def schedule(self, spoonacular_ids):
+        """Queue a refresh for any of these recipes that isn't queued or backing off"""
+        now = time.monotonic()
+        with self._lock:
+            new_ids = [
+                spoonacular_id
+                for spoonacular_id in dict.fromkeys(spoonacular_ids)
+                if spoonacular_id not in self._in_flight
+                and self._retry_after.get(spoonacular_id, (0, 0))[0] <= now
+            ]
+            self._in_flight.update(new_ids)
+
+        for start in range(0, len(new_ids), self.batch_size):
+            self._executor.submit(
+                self._refresh, new_ids[start : start + self.batch_size]
+            )
+
+    def _refresh(self, spoonacular_ids):
+        try:
+            refresh_recipes(spoonacular_ids)
+        except Exception as e:
+            logger.error(f"Background recipe refresh failed: {e}")
+            self._back_off(spoonacular_ids)
+        else:
+            with self._lock:
+                for spoonacular_id in spoonacular_ids:
+                    self._retry_after.pop(spoonacular_id, None)
+        finally:
+            with self._lock:
+                self._in_flight.difference_update(spoonacular_ids)
+            # Each worker thread opens its own DB connection; close it so it isn't leaked
+            connections.close_all()
+
+    def _back_off(self, spoonacular_ids):
+        """Keep recipes whose refresh failed from being queued again for a while"""
+        now = time.monotonic()
+        with self._lock:
+            for spoonacular_id in spoonacular_ids:
+                failures = self._retry_after.get(spoonacular_id, (0, 0))[1] + 1
+                delay = self.retry_after * 2 ** min(
+                    failures - 1, self.MAX_BACKOFF_DOUBLINGS
+                )
+                self._retry_after[spoonacular_id] = (now + delay, failures)
+
+
+background_refresher = BackgroundRefresher(
+    max_workers=settings.RECIPE_REFRESH_WORKERS,
+    batch_size=settings.RECIPE_REFRESH_BATCH_SIZE,
+    retry_after=settings.RECIPE_REFRESH_RETRY_AFTER,
+)
+
+
+def refresh_if_stale(recipes):
+    """
+    Stale-while-revalidate: queue a background refresh for the stale recipes
+    The caller keeps serving the rows it already has.
+
+    recipes: iterable of (spoonacular_id, fetched_at) pairs
+    """
+    if not settings.RECIPE_STALE_WHILE_REVALIDATE:
+        return
+
+    stale_ids = [
+        spoonacular_id for spoonacular_id, fetched_at in recipes if is_stale(fetched_at)
+    ]
+    if stale_ids:
+        background_refresher.schedule(stale_ids)
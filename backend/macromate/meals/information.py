@@ -0,0 +1,83 @@
+"""
+Full Spoonacular recipe information stored on Recipe.information
+
+Shopping lists need each recipe's extendedIngredients (aisle, image, amounts,
+estimated cost). Instead of downloading that for every list, we keep it on the
+Recipe row for RECIPE_INFORMATION_TTL seconds:
+1. complexSearch results that already include it (addRecipeInformation) are saved
+   while caching recipes
+2. Anything the shopping list service has to fetch is saved after fetching
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Recipe
+
+
+def information_payload(recipe_data):
+    """
+    The part of a Spoonacular recipe worth storing as Recipe.information
+
+    recipe_data: one recipe from complexSearch / information / informationBulk
+    Returns: dictionary, or None if it doesn't include the ingredient details
+    """
+    if not recipe_data.get("extendedIngredients"):
+        return None
+
+    # Nutrition is already in its own columns and is the bulk of the payload
+    return {key: value for key, value in recipe_data.items() if key != "nutrition"}
+
+
+def stored_recipe_information(spoonacular_ids):
+    """
+    Recipe information we already have and that is still within its TTL
+
+    Returns: {spoonacular_id: information} for the recipes that have it
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.RECIPE_INFORMATION_TTL)
+
+    return dict(
+        Recipe.objects.filter(
+            spoonacular_id__in=spoonacular_ids,
+            information__isnull=False,
+            information_fetched_at__gte=cutoff,
+        ).values_list("spoonacular_id", "information")
+    )
+
+
+def save_recipe_information(information_by_spoonacular_id, recipes=None):
+    """
+    Store recipe information on the matching Recipe rows in one UPDATE
+
+    information_by_spoonacular_id: {spoonacular_id: payload}; None payloads are skipped
+    recipes: optional {spoonacular_id: Recipe} already loaded by the caller
+    """
+    information = {
+        spoonacular_id: payload
+        for spoonacular_id, payload in information_by_spoonacular_id.items()
+        if payload is not None
+    }
+    if not information:
+        return
+
+    if recipes is None:
+        recipes = (
+            Recipe.objects.filter(spoonacular_id__in=information)
+            .only("id", "spoonacular_id")
+            .in_bulk(field_name="spoonacular_id")
+        )
+
+    fetched_at = timezone.now()
+    updated = []
+    for spoonacular_id, payload in information.items():
+        recipe = recipes.get(spoonacular_id)
+        if recipe is None:
+            continue
+        recipe.information = payload
+        recipe.information_fetched_at = fetched_at
+        updated.append(recipe)
+
+    Recipe.objects.bulk_update(updated, ["information", "information_fetched_at"])
@@ -0,0 +1,150 @@
+"""
+Keeps the normalized Ingredient / RecipeIngredient tables in step with the
+ingredient lists we cache on Recipe
+"""
+
+from django.db import transaction
+
+from .models import Ingredient, RecipeIngredient
+
+
+def canonical_name(ingredient):
+    """Name an ingredient is stored under - lowercased, without extra spaces"""
+    name = ingredient.get("name") or ingredient.get("original") or ""
+    return " ".join(name.lower().split())[:255]
+
+
+def save_recipe_ingredients(ingredients_by_recipe, replaced_recipe_ids=None):
+    """
+    Replace the RecipeIngredient rows of some recipes
+
+    A handful of bulk queries however many recipes there are: upsert the
+    ingredients, look up their IDs, then rewrite the through rows.
+
+    ingredients_by_recipe: {Recipe.id: list of dictionaries from _extract_ingredients()}
+    replaced_recipe_ids: the recipes that may already have rows to delete
+                         (defaults to all of them; brand new recipes have none)
+    """
+    if replaced_recipe_ids is None:
+        replaced_recipe_ids = list(ingredients_by_recipe)
+
+    # Nothing to write and nothing to clear out
+    if not replaced_recipe_ids and not any(ingredients_by_recipe.values()):
+        return
+
+    with_id = {}  # Spoonacular ingredient ID -> Ingredient
+    without_id = {}  # name -> Ingredient
+
+    for ingredients in ingredients_by_recipe.values():
+        for ingredient in ingredients:
+            name = canonical_name(ingredient)
+            if not name:
+                continue
+
+            if ingredient.get("id"):
+                with_id[ingredient["id"]] = Ingredient(
+                    spoonacular_id=ingredient["id"],
+                    name=name,
+                    aisle=ingredient.get("aisle") or "",
+                )
+            else:
+                without_id.setdefault(
+                    name, Ingredient(name=name, aisle=ingredient.get("aisle") or "")
+                )
+
+    with transaction.atomic():
+        if with_id:
+            Ingredient.objects.bulk_create(
+                with_id.values(),
+                update_conflicts=True,
+                unique_fields=["spoonacular_id"],
+                update_fields=["name", "aisle"],
+            )
+        if without_id:
+            Ingredient.objects.bulk_create(without_id.values(), ignore_conflicts=True)
+
+        ids_by_spoonacular_id = dict(
+            Ingredient.objects.filter(spoonacular_id__in=with_id).values_list(
+                "spoonacular_id", "id"
+            )
+        )
+        ids_by_name = dict(
+            Ingredient.objects.filter(
+                spoonacular_id__isnull=True, name__in=without_id
+            ).values_list("name", "id")
+        )
+
+        rows = []
+        for recipe_id, ingredients in ingredients_by_recipe.items():
+            for ingredient in ingredients:
+                name = canonical_name(ingredient)
+                if not name:
+                    continue
+
+                if ingredient.get("id"):
+                    ingredient_id = ids_by_spoonacular_id.get(ingredient["id"])
+                else:
+                    ingredient_id = ids_by_name.get(name)
+
+                rows.append(
+                    RecipeIngredient(
+                        recipe_id=recipe_id,
+                        ingredient_id=ingredient_id,
+                        amount=ingredient.get("amount") or 0,
+                        unit=(ingredient.get("unit") or "")[:50],
+                        original=ingredient.get("original") or "",
+                    )
+                )
+
+        if replaced_recipe_ids:
+            RecipeIngredient.objects.filter(recipe_id__in=replaced_recipe_ids).delete()
+        RecipeIngredient.objects.bulk_create(rows)
+
+
+def recipe_ingredient_information(spoonacular_ids):
+    """
+    Minimal recipe information (servings + extendedIngredients) rebuilt from the
+    RecipeIngredient rows, in one query
+
+    Used by shopping lists when a recipe's full information can't be fetched.
+    There's no image or price data, so costs fall back to the catalog/estimates.
+
+    Returns: {spoonacular_id: information} for the recipes that have rows
+    """
+    information = {}
+
+    rows = (
+        RecipeIngredient.objects.filter(recipe__spoonacular_id__in=spoonacular_ids)
+        .order_by("recipe_id", "id")
+        .values(
+            "recipe__spoonacular_id",
+            "recipe__servings",
+            "ingredient__spoonacular_id",
+            "ingredient__name",
+            "ingredient__aisle",
+            "amount",
+            "unit",
+            "original",
+        )
+    )
+    for row in rows:
+        recipe_information = information.setdefault(
+            row["recipe__spoonacular_id"],
+            {
+                "id": row["recipe__spoonacular_id"],
+                "servings": row["recipe__servings"],
+                "extendedIngredients": [],
+            },
+        )
+        recipe_information["extendedIngredients"].append(
+            {
+                "id": row["ingredient__spoonacular_id"],
+                "name": row["ingredient__name"],
+                "aisle": row["ingredient__aisle"] or "Other",
+                "amount": row["amount"],
+                "unit": row["unit"],
+                "original": row["original"],
+            }
+        )
+
+    return information
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from meals.models import MealPlan
+
+
+class Command(BaseCommand):
+    """
+    Recalculate the stored daily totals on existing meal plans
+    Usage: python manage.py backfill_meal_plan_totals [--batch-size 5000]
+
+    Migration 0004 already fills them in on deploy; this is for re-syncing them
+    by hand (e.g. after editing recipe nutrition directly in the database).
+    """
+
+    help = "Recalculate the stored nutrition totals of every MealPlan"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Meal plans updated per UPDATE statement",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        updated = 0
+        last_id = 0
+
+        # Walk the table in ID order so each UPDATE stays small
+        while True:
+            batch_ids = list(
+                MealPlan.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not batch_ids:
+                break
+
+            updated += MealPlan.objects.filter(id__in=batch_ids).recalculate_totals()
+            last_id = batch_ids[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Recalculated totals for {updated} meal plans")
+        )
@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from meals.freshness import refresh_recipes, stale_recipes
+
+
+class Command(BaseCommand):
+    """
+    Re-pull cached recipes that are older than RECIPE_STALE_AFTER
+    Usage: python manage.py refresh_stale_recipes [--batch-size 50] [--limit 1000]
+
+    Meant to run on a schedule (e.g. nightly). Each batch is one informationBulk
+    call; recipes whose content hasn't changed are not rewritten.
+    """
+
+    help = "Refresh stale cached recipes from Spoonacular in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.RECIPE_REFRESH_BATCH_SIZE,
+            help="Recipes per informationBulk call",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Most recipes to refresh in this run (oldest first)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        stale_ids = stale_recipes().values_list("spoonacular_id", flat=True)
+        if options["limit"] is not None:
+            stale_ids = stale_ids[: options["limit"]]
+        stale_ids = list(stale_ids)
+
+        refreshed = 0
+        failed = 0
+
+        for start in range(0, len(stale_ids), batch_size):
+            batch = stale_ids[start : start + batch_size]
+            try:
+                refreshed += len(refresh_recipes(batch))
+            except Exception as e:
+                failed += len(batch)
+                self.stderr.write(f"Error refreshing batch starting at {batch[0]}: {e}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Refreshed {refreshed} of {len(stale_ids)} stale recipes"
+                + (f" ({failed} failed)" if failed else "")
+            )
+        )
@@ -0,0 +1,177 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max
+
+from macromate.caches import is_shared_cache
+from meal_planning.models import MacroGoal
+from meals.cache import recipe_cache, recipe_cache_key, suggestion_cache
+from meals.models import Recipe
+from meals.serializers import get_deferred_recipe_fields, recipe_detail_cache_entry
+from meals.services import MEAL_TYPES, MealPlannerService
+
+
+class Command(BaseCommand):
+    """
+    Pre-fill the suggestion and recipe detail caches for the most common goals
+    Usage: python manage.py warm_recipe_cache [--windows 50] [--budget 100] [--concurrency 4]
+
+    Run at deploy time (after a cache flush) and nightly so the first users of
+    each goal profile don't wait on Spoonacular.
+
+    Needs a shared cache backend (CACHE_BACKEND / CACHE_LOCATION in settings).
+    With the default per-process LocMemCache everything warmed here would be gone
+    when the command exits, so it refuses to run.
+    """
+
+    help = "Warm the meal suggestion and recipe detail caches for popular macro windows"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--windows",
+            type=int,
+            default=50,
+            help="How many of the most common (meal, macro window) pairs to warm",
+        )
+        parser.add_argument(
+            "--number",
+            type=int,
+            default=24,
+            help="Recipes per suggestion result (must match what the API asks for)",
+        )
+        parser.add_argument(
+            "--budget",
+            type=float,
+            default=100,
+            help="Most Spoonacular points to spend on searches",
+        )
+        parser.add_argument(
+            "--points-per-search",
+            type=float,
+            default=2.5,
+            help="Estimated points one complexSearch with recipe information costs",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Spoonacular searches run at the same time",
+        )
+
+    def handle(self, *args, **options):
+        if not is_shared_cache():
+            raise CommandError(
+                "The default cache is per-process (LocMemCache), so web workers "
+                "would never see warmed entries. Set CACHE_BACKEND / CACHE_LOCATION "
+                "to a shared backend such as Redis first."
+            )
+
+        number = options["number"]
+
+        windows = self.popular_windows(number)[: options["windows"]]
+        self.stdout.write(f"Warming {len(windows)} macro windows")
+
+        # Pass 1: windows our own recipe table can already fill cost nothing
+        recipe_ids = set()
+        needs_search = []
+        for cache_key, planner, meal_type in windows:
+            cached_ids = suggestion_cache.get(cache_key)
+            if cached_ids is not None:
+                recipe_ids.update(cached_ids)
+                continue
+
+            recipes = planner.fetch_meal_options(meal_type, number, remote=False)
+            if len(recipes) >= number:
+                recipe_ids.update(recipe["id"] for recipe in recipes)
+            else:
+                needs_search.append((planner, meal_type))
+
+        # Pass 2: search Spoonacular for the rest, most popular first, within budget
+        max_searches = int(options["budget"] // options["points_per_search"])
+        searches = needs_search[:max_searches]
+        if len(needs_search) > len(searches):
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Budget only covers {len(searches)} of {len(needs_search)} searches"
+                )
+            )
+
+        if searches:
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+                for recipes in executor.map(
+                    lambda search: self.search(*search, number), searches
+                ):
+                    recipe_ids.update(recipe["id"] for recipe in recipes)
+
+        warmed = self.warm_recipe_details(recipe_ids)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Warmed {len(windows)} windows ({len(searches)} upstream searches) "
+                f"and {warmed} recipe details"
+            )
+        )
+
+    def popular_windows(self, number):
+        """
+        Count how many users share each snapped (meal, macro window)
+
+        Only each account's most recent goal counts, like the API uses.
+        Returns: list of (cache_key, planner, meal_type), most common first
+        """
+        latest_goal_ids = (
+            MacroGoal.objects.values("account")
+            .annotate(latest=Max("id"))
+            .values("latest")
+        )
+
+        counts = Counter()
+        examples = {}  # cache_key -> (planner, meal_type) that produces it
+
+        for goal in MacroGoal.objects.filter(id__in=latest_goal_ids).iterator():
+            planner = MealPlannerService(goal)
+            for meal_type in MEAL_TYPES:
+                targets = planner.snap_targets(planner.get_meal_targets(meal_type))
+                cache_key = planner.suggestion_cache_key(meal_type, targets, number)
+                counts[cache_key] += 1
+                examples.setdefault(cache_key, (planner, meal_type))
+
+        return [
+            (cache_key, *examples[cache_key]) for cache_key, _ in counts.most_common()
+        ]
+
+    def search(self, planner, meal_type, number):
+        """Fetch one window from Spoonacular inside a worker thread"""
+        try:
+            return planner.fetch_meal_options(meal_type, number)
+        except Exception as e:
+            self.stderr.write(f"Error warming {meal_type} options: {str(e)}")
+            return []
+        finally:
+            # Each worker thread opens its own DB connection; close it so it isn't leaked
+            connections.close_all()
+
+    def warm_recipe_details(self, recipe_ids):
+        """Put every suggested recipe that isn't cached yet into recipe_cache"""
+        missing = [
+            recipe_id
+            for recipe_id, updated_at in Recipe.objects.filter(
+                id__in=recipe_ids
+            ).values_list("id", "updated_at")
+            if recipe_cache.get(recipe_cache_key(recipe_id, updated_at)) is None
+        ]
+
+        warmed = 0
+        recipes = Recipe.objects.filter(id__in=missing).defer(
+            *get_deferred_recipe_fields(None)
+        )
+        for recipe in recipes.iterator():
+            recipe_cache.set(
+                recipe_cache_key(recipe.id, recipe.updated_at),
+                recipe_detail_cache_entry(recipe),
+            )
+            warmed += 1
+
+        return warmed
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("meals", "0002_recipe_servings"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["meal_type", "calories"], name="recipe_meal_calories_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["meal_type", "proteins"], name="recipe_meal_proteins_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["meal_type", "fats"], name="recipe_meal_fats_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["meal_type", "carbohydrates"], name="recipe_meal_carbs_idx"
+            ),
+        ),
+    ]
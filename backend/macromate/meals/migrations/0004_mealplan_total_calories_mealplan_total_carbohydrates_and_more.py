@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:31
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_totals(apps, schema_editor):
+    """Fill in the new totals of existing meal plans (MealPlanQuerySet.recalculate_totals)"""
+    MealPlan = apps.get_model("meals", "MealPlan")
+    Recipe = apps.get_model("meals", "Recipe")
+
+    updates = {}
+    for macro in ["calories", "proteins", "fats", "carbohydrates"]:
+        slot_values = [
+            Coalesce(
+                Subquery(Recipe.objects.filter(pk=OuterRef(meal)).values(macro)[:1]),
+                Value(0.0),
+            )
+            for meal in ["breakfast", "lunch", "dinner"]
+        ]
+        updates[f"total_{macro}"] = slot_values[0] + slot_values[1] + slot_values[2]
+
+    # Walk the table in ID order so each UPDATE stays small
+    last_id = 0
+    while True:
+        batch_ids = list(
+            MealPlan.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:5000]
+        )
+        if not batch_ids:
+            break
+
+        MealPlan.objects.filter(id__in=batch_ids).update(**updates)
+        last_id = batch_ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("meals", "0003_recipe_recipe_meal_calories_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mealplan",
+            name="total_calories",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="mealplan",
+            name="total_carbohydrates",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="mealplan",
+            name="total_fats",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="mealplan",
+            name="total_proteins",
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
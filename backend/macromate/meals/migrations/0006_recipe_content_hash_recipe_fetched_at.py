@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:38
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_fetched_at(apps, schema_editor):
+    """Existing recipes were fetched when they were cached - don't treat them all as stale"""
+    Recipe = apps.get_model("meals", "Recipe")
+    Recipe.objects.filter(fetched_at__isnull=True).update(fetched_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("meals", "0005_recipe_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="content_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="fetched_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(backfill_fetched_at, migrations.RunPython.noop),
+    ]
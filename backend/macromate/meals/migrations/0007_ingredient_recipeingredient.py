@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("meals", "0006_recipe_content_hash_recipe_fetched_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Ingredient",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "spoonacular_id",
+                    models.IntegerField(blank=True, null=True, unique=True),
+                ),
+                ("name", models.CharField(db_index=True, max_length=255)),
+                ("aisle", models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("spoonacular_id__isnull", True)),
+                        fields=("name",),
+                        name="ingredient_unique_name_without_id",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="RecipeIngredient",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("amount", models.FloatField(default=0)),
+                ("unit", models.CharField(blank=True, max_length=50)),
+                ("original", models.TextField(blank=True)),
+                (
+                    "ingredient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recipe_ingredients",
+                        to="meals.ingredient",
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recipe_ingredients",
+                        to="meals.recipe",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="normalized_ingredients",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="recipes",
+                through="meals.RecipeIngredient",
+                to="meals.ingredient",
+            ),
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.db import migrations
+
+
+def canonical_name(ingredient):
+    name = ingredient.get("name") or ingredient.get("original") or ""
+    return " ".join(name.lower().split())[:255]
+
+
+def backfill_recipe_ingredients(apps, schema_editor):
+    """Build Ingredient / RecipeIngredient rows from the cached Recipe.ingredients JSON"""
+    Recipe = apps.get_model("meals", "Recipe")
+    Ingredient = apps.get_model("meals", "Ingredient")
+    RecipeIngredient = apps.get_model("meals", "RecipeIngredient")
+
+    ingredient_ids = {}  # ("id", spoonacular id) or ("name", name) -> Ingredient.id
+    rows = []
+
+    for recipe in Recipe.objects.only("id", "ingredients").iterator(chunk_size=500):
+        for ingredient in recipe.ingredients or []:
+            if not isinstance(ingredient, dict):
+                continue
+            name = canonical_name(ingredient)
+            if not name:
+                continue
+
+            if ingredient.get("id"):
+                key = ("id", ingredient["id"])
+                lookup = {"spoonacular_id": ingredient["id"]}
+            else:
+                key = ("name", name)
+                lookup = {"spoonacular_id": None, "name": name}
+
+            if key not in ingredient_ids:
+                ingredient_ids[key] = Ingredient.objects.get_or_create(
+                    **lookup,
+                    defaults={"name": name, "aisle": ingredient.get("aisle") or ""},
+                )[0].id
+
+            rows.append(
+                RecipeIngredient(
+                    recipe_id=recipe.id,
+                    ingredient_id=ingredient_ids[key],
+                    amount=ingredient.get("amount") or 0,
+                    unit=(ingredient.get("unit") or "")[:50],
+                    original=ingredient.get("original") or "",
+                )
+            )
+
+            if len(rows) >= 5000:
+                RecipeIngredient.objects.bulk_create(rows)
+                rows = []
+
+    RecipeIngredient.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("meals", "0007_ingredient_recipeingredient"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_recipe_ingredients, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("meals", "0008_backfill_recipe_ingredients"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="information",
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="information_fetched_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from accounts.models import Account
 from meal_planning.models import MacroGoal
 
@@ -34,6 +36,10 @@ class Recipe(models.Model):
     summary = models.TextField(blank=True)  # Description of the recipe
     instructions = models.TextField(blank=True)  # Step-by-step cooking instructions
     ingredients = models.JSONField(default=list)  # List of ingredients stored as JSON
+    # The same ingredients as rows, for SQL lookups (see RecipeIngredient)
+    normalized_ingredients = models.ManyToManyField(
+        "Ingredient", through="RecipeIngredient", related_name="recipes", blank=True
+    )
 
     # Classification - what type of meal this is
     MEAL_TYPES = [
@@ -45,12 +51,119 @@ class Recipe(models.Model):
 
     # Tracking when recipe was added to our database
     created_at = models.DateTimeField(auto_now_add=True)  # Set once when created
+    updated_at = models.DateTimeField(auto_now=True)  # Updated every time re-cached
+
+    # Freshness - when we last pulled this recipe from Spoonacular, and a hash of
+    # what we got, so an unchanged re-fetch doesn't rewrite the row (see freshness.py)
+    fetched_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    content_hash = models.CharField(max_length=64, blank=True, default="")
+
+    # Full Spoonacular recipe information (extendedIngredients with aisles, images,
+    # amounts...) used for shopping lists, and when we got it (see information.py)
+    information = models.JSONField(null=True, blank=True)
+    information_fetched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """Database indexes for the local suggestion engine"""
+
+        # Suggestions filter on meal type plus a min/max window for every macro,
+        # so each macro gets a composite index led by meal_type
+        indexes = [
+            models.Index(
+                fields=["meal_type", "calories"], name="recipe_meal_calories_idx"
+            ),
+            models.Index(
+                fields=["meal_type", "proteins"], name="recipe_meal_proteins_idx"
+            ),
+            models.Index(fields=["meal_type", "fats"], name="recipe_meal_fats_idx"),
+            models.Index(
+                fields=["meal_type", "carbohydrates"], name="recipe_meal_carbs_idx"
+            ),
+        ]
 
     def __str__(self):
         """What to display when printing this recipe object"""
         return self.title
 
 
+class Ingredient(models.Model):
+    """
+    One ingredient, shared by every recipe that uses it
+    Identified by Spoonacular's ingredient ID, or by name when the API didn't give one
+    """
+
+    spoonacular_id = models.IntegerField(unique=True, null=True, blank=True)
+    name = models.CharField(
+        max_length=255, db_index=True
+    )  # Lowercased, e.g. "olive oil"
+    aisle = models.CharField(max_length=255, blank=True)  # Store aisle, e.g. "Produce"
+
+    class Meta:
+        constraints = [
+            # Ingredients without a Spoonacular ID are matched by name instead
+            models.UniqueConstraint(
+                fields=["name"],
+                condition=models.Q(spoonacular_id__isnull=True),
+                name="ingredient_unique_name_without_id",
+            )
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class RecipeIngredient(models.Model):
+    """How much of an ingredient one recipe uses"""
+
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, related_name="recipe_ingredients"
+    )
+    ingredient = models.ForeignKey(
+        Ingredient, on_delete=models.CASCADE, related_name="recipe_ingredients"
+    )
+    amount = models.FloatField(default=0)
+    unit = models.CharField(max_length=50, blank=True)
+    original = models.TextField(
+        blank=True
+    )  # The recipe's own line, e.g. "2 cups flour"
+
+    def __str__(self):
+        return f"{self.recipe} - {self.ingredient}"
+
+
+class MealPlanQuerySet(models.QuerySet):
+    """Custom queries for MealPlan"""
+
+    def recalculate_totals(self):
+        """
+        Recalculate the stored daily totals of every meal plan in this queryset
+        from its current recipes, in a single UPDATE statement
+
+        Returns: number of meal plans updated
+        """
+        updates = {}
+
+        for total_field, macro in [
+            ("total_calories", "calories"),
+            ("total_proteins", "proteins"),
+            ("total_fats", "fats"),
+            ("total_carbohydrates", "carbohydrates"),
+        ]:
+            # Look up this macro for each slot's recipe (0 if the slot is empty)
+            slot_values = [
+                Coalesce(
+                    Subquery(
+                        Recipe.objects.filter(pk=OuterRef(meal)).values(macro)[:1]
+                    ),
+                    Value(0.0),
+                )
+                for meal in ["breakfast", "lunch", "dinner"]
+            ]
+            updates[total_field] = slot_values[0] + slot_values[1] + slot_values[2]
+
+        return self.update(**updates)
+
+
 class MealPlan(models.Model):
     """
     Model representing a complete meal plan for one day
@@ -88,10 +201,20 @@ class MealPlan(models.Model):
         related_name="dinner_plans",
     )
 
+    # Daily nutrition totals of the selected recipes, stored so history and charts
+    # don't need to load three recipes per day. Kept up to date by refresh_totals()
+    # when a slot changes and MealPlanQuerySet.recalculate_totals() when a recipe changes
+    total_calories = models.FloatField(default=0)
+    total_proteins = models.FloatField(default=0)
+    total_fats = models.FloatField(default=0)
+    total_carbohydrates = models.FloatField(default=0)
+
     # Tracking when meal plan was created/updated
     created_at = models.DateTimeField(auto_now_add=True)  # Set once when created
     updated_at = models.DateTimeField(auto_now=True)  # Updated every time saved
 
+    objects = MealPlanQuerySet.as_manager()
+
     class Meta:
         """Database constraints and settings"""
 
@@ -102,42 +225,27 @@ class MealPlan(models.Model):
         """What to display when printing this meal plan object"""
         return f"{self.account.email} - {self.date}"
 
-    # Properties that calculate nutrition totals automatically
-    # These act like attributes but calculate their values each time accessed
+    def refresh_totals(self):
+        """
+        Recalculate the stored daily totals from the selected recipes
+        Call this whenever breakfast/lunch/dinner change, before saving
+        """
+        meals = [meal for meal in [self.breakfast, self.lunch, self.dinner] if meal]
 
-    @property
-    def total_calories(self):
-        """Calculate total calories from all selected meals"""
-        total = 0  # Start with zero
-        # Loop through each meal (breakfast, lunch, dinner)
-        for meal in [self.breakfast, self.lunch, self.dinner]:
-            if meal:  # Only add if meal is selected (not None)
-                total += meal.calories  # Add this meal's calories to total
-        return total
+        self.total_calories = sum(meal.calories for meal in meals)
+        self.total_proteins = sum(meal.proteins for meal in meals)
+        self.total_fats = sum(meal.fats for meal in meals)
+        self.total_carbohydrates = sum(meal.carbohydrates for meal in meals)
 
+    # Older names for the protein/fat/carb totals
     @property
     def total_protein(self):
-        """Calculate total protein grams from all selected meals"""
-        total = 0
-        for meal in [self.breakfast, self.lunch, self.dinner]:
-            if meal:  # Check if meal exists
-                total += meal.proteins  # Updated to match field name
-        return total
+        return self.total_proteins
 
     @property
     def total_fat(self):
-        """Calculate total fat grams from all selected meals"""
-        total = 0
-        for meal in [self.breakfast, self.lunch, self.dinner]:
-            if meal:
-                total += meal.fats  # Updated to match field name
-        return total
+        return self.total_fats
 
     @property
     def total_carbs(self):
-        """Calculate total carbohydrate grams from all selected meals"""
-        total = 0
-        for meal in [self.breakfast, self.lunch, self.dinner]:
-            if meal:
-                total += meal.carbohydrates  # Updated to match field name
-        return total
+        return self.total_carbohydrates
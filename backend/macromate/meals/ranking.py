@@ -0,0 +1,205 @@
+"""
+Vectorized macro-fit ranking for candidate recipes
+
+Candidates are loaded as an (n, 4) NumPy matrix of calories/proteins/fats/carbohydrates
+and scored against a per-meal target vector in a single pass. This is the only
+place recipes are scored - MealPlannerService._rank_window just decides which
+cached rows (a box around the target, read through the macro indexes) to load.
+"""
+
+import numpy as np
+
+# Column order used by every matrix and target vector in this module
+MACROS = ["calories", "proteins", "fats", "carbohydrates"]
+
+
+def macro_fit_scores(matrix, target, weights):
+    """
+    Score how far each recipe is from the target (lower is better)
+
+    Uses a weighted distance on relative errors, so being 50 kcal off and
+    being 5 g of protein off are put on the same scale.
+
+    matrix: (n, 4) array of recipe macros in MACROS order
+    target: length-4 array of target macros
+    weights: length-4 array of how much each macro matters
+    Returns: length-n array of scores
+    """
+    target = np.asarray(target, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+
+    # Avoid dividing by zero when a goal is 0
+    scale = np.where(target > 0, target, 1.0)
+    relative_error = (np.asarray(matrix, dtype=float) - target) / scale
+
+    return np.sqrt((relative_error**2) @ weights)
+
+
+def top_k_indices(scores, k):
+    """
+    Indices of the k lowest scores, best first
+
+    argpartition finds the k best in O(n), then only those k get sorted.
+    """
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+
+    if k >= len(scores):
+        return np.argsort(scores, kind="stable")
+
+    best = np.argpartition(scores, k)[:k]
+    return best[np.argsort(scores[best], kind="stable")]
+
+
+def rank_recipes(rows, target, weights, k):
+    """
+    Rank candidate recipes by macro fit
+
+    rows: list (or array) of (id, calories, proteins, fats, carbohydrates) rows
+    target: length-4 target macros in MACROS order
+    weights: length-4 macro weights
+    k: how many recipes to return
+    Returns: list of (id, score) tuples, best first
+    """
+    if len(rows) == 0 or k <= 0:
+        return []
+
+    data = np.asarray(rows, dtype=float)
+    ids = data[:, 0].astype(np.int64)
+    scores = macro_fit_scores(data[:, 1:], target, weights)
+
+    return [(int(ids[i]), float(scores[i])) for i in top_k_indices(scores, k)]
+
+
+def best_day_plans(breakfast_rows, lunch_rows, dinner_rows, goal, weights, top_n=5):
+    """
+    Find the breakfast+lunch+dinner triples whose combined macros best hit the daily goal
+
+    Instead of a triple loop, every breakfast+lunch pair is built with one broadcast
+    (nb * nl rows). The weighted squared error of pair + dinner then expands to
+    |pair|^2 + |dinner|^2 + 2 * pair . dinner, so scoring a chunk of pairs against
+    every dinner is a single matrix multiply. Only the best top_n of each chunk are
+    kept, so 200 x 200 x 200 candidates (8M plans) take well under a second.
+
+    *_rows: list (or array) of (id, calories, proteins, fats, carbohydrates) rows
+    goal: length-4 daily macro goal in MACROS order
+    weights: length-4 macro weights
+    top_n: how many plans to return
+    Returns: list of (breakfast_id, lunch_id, dinner_id, score) tuples, best first
+    """
+    if top_n <= 0 or min(len(breakfast_rows), len(lunch_rows), len(dinner_rows)) == 0:
+        return []
+
+    breakfast = np.asarray(breakfast_rows, dtype=float)
+    lunch = np.asarray(lunch_rows, dtype=float)
+    dinner = np.asarray(dinner_rows, dtype=float)
+
+    goal = np.asarray(goal, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    scale = np.where(goal > 0, goal, 1.0)
+
+    # Every breakfast+lunch pair, as its relative distance from the daily goal
+    pair_totals = (breakfast[:, None, 1:] + lunch[None, :, 1:]).reshape(-1, 4)
+    pair_error = (pair_totals - goal) / scale
+    pair_norms = (pair_error**2) @ weights
+
+    # Each dinner as a fraction of the daily goal
+    dinner_share = dinner[:, 1:] / scale
+    dinner_norms = (dinner_share**2) @ weights
+    weighted_dinner_share = (dinner_share * weights).T
+    dinner_count = len(dinner)
+
+    # Keep each chunk's (pairs x dinners) score block around a million values
+    chunk_size = max(1, 1_000_000 // dinner_count)
+
+    best_scores = []
+    best_plans = []  # flat index into (pair, dinner)
+
+    for start in range(0, len(pair_error), chunk_size):
+        chunk = slice(start, start + chunk_size)
+
+        # (chunk, nd) weighted squared errors of pair + dinner vs the goal
+        scores = (
+            pair_norms[chunk, None]
+            + dinner_norms[None, :]
+            + 2 * (pair_error[chunk] @ weighted_dinner_share)
+        )
+
+        flat_scores = scores.ravel()
+        best = top_k_indices(flat_scores, top_n)
+        best_scores.append(flat_scores[best])
+        best_plans.append(best + start * dinner_count)
+
+    all_scores = np.concatenate(best_scores)
+    all_plans = np.concatenate(best_plans)
+    winners = top_k_indices(all_scores, top_n)
+
+    plans = []
+    for index in winners:
+        pair_index, dinner_index = divmod(int(all_plans[index]), dinner_count)
+        breakfast_index, lunch_index = divmod(pair_index, len(lunch))
+        plans.append(
+            (
+                int(breakfast[breakfast_index, 0]),
+                int(lunch[lunch_index, 0]),
+                int(dinner[dinner_index, 0]),
+                # Rounding in the expansion can leave tiny negatives
+                float(np.sqrt(max(all_scores[index], 0.0))),
+            )
+        )
+
+    return plans
+
+
+def plan_days(breakfast_rows, lunch_rows, dinner_rows, goal, weights, days):
+    """
+    Pick one breakfast+lunch+dinner triple per day for several days
+
+    Takes the best-scoring plans that don't share a recipe with an earlier day, so
+    no recipe repeats within the period. If a meal's pool is too small for that, its
+    recipes may come back, but not on two days in a row unless the pool only has one.
+
+    *_rows: list of (id, calories, proteins, fats, carbohydrates) rows
+    goal: length-4 daily macro goal in MACROS order
+    weights: length-4 macro weights
+    days: how many days to plan
+    Returns: list of (breakfast_id, lunch_id, dinner_id, score) tuples, one per day
+    """
+    pools = [breakfast_rows, lunch_rows, dinner_rows]
+    chosen = []
+    used = set()
+
+    while len(chosen) < days:
+        previous_day = set(chosen[-1][:3]) if chosen else set()
+        remaining = []
+
+        for rows in pools:
+            unused = [row for row in rows if row[0] not in used]
+            if not unused:
+                # This meal has run out of fresh recipes - let them come back,
+                # except the one eaten the previous day
+                used -= {row[0] for row in rows} - previous_day
+                unused = [row for row in rows if row[0] not in used]
+            if not unused:
+                # Every recipe for this meal was eaten the previous day (a pool of
+                # one) - repeating it beats planning fewer days than asked for
+                used -= {row[0] for row in rows}
+                unused = list(rows)
+            remaining.append(unused)
+
+        if not all(remaining):
+            break
+
+        plans = best_day_plans(
+            *remaining, goal, weights, top_n=(days - len(chosen)) * 50
+        )
+
+        # Greedily take the best plans that don't reuse a recipe
+        for plan in plans:
+            if used.isdisjoint(plan[:3]):
+                chosen.append(plan)
+                used.update(plan[:3])
+                if len(chosen) == days:
+                    break
+
+    return chosen
@@ -1,8 +1,40 @@
 from rest_framework import serializers
 from .models import Recipe, MealPlan
 
+# Recipe fields a simple day view needs (title, image and macros)
+COMPACT_RECIPE_FIELDS = [
+    "id",
+    "title",
+    "image",
+    "calories",
+    "proteins",
+    "fats",
+    "carbohydrates",
+]
 
-class RecipeSerializer(serializers.ModelSerializer):
+# Large text/JSON columns we skip loading unless they are asked for
+HEAVY_RECIPE_FIELDS = ["summary", "instructions", "ingredients"]
+
+# Columns we store but never send to the frontend - never loaded for responses
+UNSERIALIZED_RECIPE_FIELDS = ["information"]
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    A ModelSerializer that takes an extra `fields` argument
+    to limit which fields are included in the output
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
+class RecipeSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Recipe
         fields = [
@@ -40,3 +72,51 @@ class MealPlanSerializer(serializers.ModelSerializer):
             "updated_at",
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
+
+    def __init__(self, *args, **kwargs):
+        """recipe_fields: optional list of fields to include for each nested recipe"""
+        recipe_fields = kwargs.pop("recipe_fields", None)
+        super().__init__(*args, **kwargs)
+
+        if recipe_fields is not None:
+            for meal in ["breakfast", "lunch", "dinner"]:
+                self.fields[meal] = RecipeSerializer(
+                    read_only=True, fields=recipe_fields
+                )
+
+
+def get_requested_recipe_fields(query_params):
+    """
+    Work out which recipe fields the client asked for
+
+    ?view=compact -> COMPACT_RECIPE_FIELDS
+    ?fields=title,image,calories -> just those (plus id)
+    Returns: list of field names, or None for the full recipe
+    """
+    if query_params.get("view") == "compact":
+        return COMPACT_RECIPE_FIELDS
+
+    fields = query_params.get("fields")
+    if not fields:
+        return None
+
+    requested = {field.strip() for field in fields.split(",")}
+    return [
+        field
+        for field in RecipeSerializer.Meta.fields
+        if field in requested or field == "id"
+    ]
+
+
+def get_deferred_recipe_fields(recipe_fields):
+    """Heavy recipe columns that don't need to be loaded for these fields"""
+    if recipe_fields is None:
+        return list(UNSERIALIZED_RECIPE_FIELDS)
+    return UNSERIALIZED_RECIPE_FIELDS + [
+        field for field in HEAVY_RECIPE_FIELDS if field not in recipe_fields
+    ]
+
+
+def recipe_detail_cache_entry(recipe):
+    """What recipe_cache stores for a recipe (under recipe_cache_key): the full serialized recipe"""
+    return dict(RecipeSerializer(recipe).data)
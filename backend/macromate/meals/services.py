@@ -1,9 +1,52 @@
+import asyncio
 import requests
 import math
+import time
+import logging
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
 from decouple import config
-from .models import Recipe
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from macromate.http_client import get_http_client
+from macromate.singleflight import async_single_flight, single_flight
+from .cache import suggestion_cache
+from .freshness import content_hash, refresh_if_stale
+from .information import information_payload, save_recipe_information
+from .ingredients import save_recipe_ingredients
+from .models import MealPlan, Recipe
+from .ranking import MACROS, best_day_plans, plan_days, rank_recipes
 from meal_planning.models import MacroGoal
 
+logger = logging.getLogger(__name__)
+
+MEAL_TYPES = ["breakfast", "lunch", "dinner"]
+
+# Recipe fields included in every meal suggestion we return
+SUGGESTION_FIELDS = [
+    "id",
+    "spoonacular_id",
+    "title",
+    "image",
+    "ready_in_minutes",
+    "servings",
+    "calories",
+    "proteins",
+    "fats",
+    "carbohydrates",
+    "summary",
+]
+
+# Extra columns loaded with suggestions to spot stale recipes (see freshness.py)
+FRESHNESS_FIELDS = ["spoonacular_id", "fetched_at"]
+
+# Relative distance from each macro target that candidate ranking starts reading
+# rows from (see MealPlannerService._rank_window); doubled until it is enough
+INITIAL_CANDIDATE_BAND = 0.1
+
 
 class MealPlannerService:
     """
@@ -14,10 +57,12 @@ class MealPlannerService:
     4. Saves recipes to our database
     """
 
-    def __init__(self, macro_goal):
+    def __init__(self, macro_goal, recipe_fields=None):
         """
         Constructor - runs when we create a new MealPlannerService
         macro_goal: A MacroGoal object from the database containing user's daily targets
+        recipe_fields: optional list of recipe fields the caller will show; other
+                       suggestion columns (e.g. summary) are then not loaded
         """
         # Convert the MacroGoal object into a dict
         self.daily_goals = {
@@ -53,6 +98,20 @@ class MealPlannerService:
 
         self.api_key = config("SPOONACULAR_API_KEY")
         self.base_url = "https://api.spoonacular.com/recipes/complexSearch"
+        self.http = get_http_client()  # Shared keep-alive client with timeouts/retries
+
+        # Columns loaded for suggestions - always keep the ID and macros for ranking
+        if recipe_fields is None:
+            self.suggestion_fields = SUGGESTION_FIELDS
+        else:
+            self.suggestion_fields = [
+                field
+                for field in SUGGESTION_FIELDS
+                if field in recipe_fields or field in ["id", *MACROS]
+            ]
+
+        # How long each meal's fetch took (seconds) in the last get_all_meal_options
+        self.meal_timings = {}
 
     def get_meal_targets(self, meal_type):
         """
@@ -95,18 +154,122 @@ class MealPlannerService:
         # Return dictionary like: {'min_calories': 400, 'max_calories': 600, ...}
         return targets
 
-    def fetch_meal_options(self, meal_type, number=24):
+    def fetch_meal_options(self, meal_type, number=24, remote=True):
         """
         Call Spoonacular API to get recipe suggestions for a specific meal
 
         meal_type: 'breakfast', 'lunch', or 'dinner'
         number: how many recipes to get (default 12)
+        remote: if False, never call Spoonacular - return whatever our cache has
+                (possibly fewer than number recipes, and not stored as a result)
         Returns: list of processed recipe dictionaries
         """
-        # calculate what macro ranges we need for this meal
-        targets = self.get_meal_targets(meal_type)
+        # calculate what macro ranges we need for this meal, snapped to shared buckets
+        targets = self.snap_targets(self.get_meal_targets(meal_type))
+
+        # Users with similar goals land in the same bucket and share one result
+        cache_key = self.suggestion_cache_key(meal_type, targets, number)
+
+        recipes, complete = self._local_meal_options(
+            meal_type, targets, cache_key, number
+        )
+        if complete or not remote:
+            return recipes
+
+        params = self._search_params(meal_type, targets, number)
+
+        def search():
+            response = self.http.get(self.base_url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            return self._store_search_results(
+                meal_type, cache_key, data.get("results", [])
+            )
+
+        try:
+            # Identical searches already in flight share one upstream call (and its
+            # recipe IDs); each caller then loads the fields it asked for
+            return self._load_suggestions(
+                single_flight.do(f"complexSearch:{cache_key}", search)
+            )
+
+        except requests.RequestException as e:
+            print(f"ERROR: API request failed for {meal_type}: {str(e)}")
+            if hasattr(e, "response") and e.response is not None:
+                print(f"ERROR: Response content: {e.response.text}")
+            raise Exception(f"Error fetching recipes from Spoonacular: {str(e)}")
+        except Exception as e:
+            print(f"ERROR: Unexpected error for {meal_type}: {str(e)}")
+            raise Exception(f"Error processing recipes for {meal_type}: {str(e)}")
+
+    async def afetch_meal_options(self, meal_type, number=24):
+        """
+        Async version of fetch_meal_options for the ASGI views
+
+        The Spoonacular call goes through the async HTTP client, so waiting on it
+        doesn't hold a worker thread. Database work runs through sync_to_async.
+        """
+        # httpx is only needed by the async routes, so it's imported here
+        import httpx
+
+        from macromate.async_http_client import get_async_http_client
+
+        targets = self.snap_targets(self.get_meal_targets(meal_type))
+        cache_key = self.suggestion_cache_key(meal_type, targets, number)
+
+        recipes, complete = await sync_to_async(self._local_meal_options)(
+            meal_type, targets, cache_key, number
+        )
+        if complete:
+            return recipes
+
+        params = self._search_params(meal_type, targets, number)
+
+        async def search():
+            response = await get_async_http_client().get(self.base_url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            return await sync_to_async(self._store_search_results)(
+                meal_type, cache_key, data.get("results", [])
+            )
+
+        try:
+            # Identical searches already in flight share one upstream call (and its
+            # recipe IDs); each caller then loads the fields it asked for
+            recipe_ids = await async_single_flight.do(
+                f"complexSearch:{cache_key}", search
+            )
+            return await sync_to_async(self._load_suggestions)(recipe_ids)
+
+        except httpx.HTTPError as e:
+            print(f"ERROR: API request failed for {meal_type}: {str(e)}")
+            raise Exception(f"Error fetching recipes from Spoonacular: {str(e)}")
+        except Exception as e:
+            print(f"ERROR: Unexpected error for {meal_type}: {str(e)}")
+            raise Exception(f"Error processing recipes for {meal_type}: {str(e)}")
+
+    def _local_meal_options(self, meal_type, targets, cache_key, number):
+        """
+        The parts of fetch_meal_options that don't call Spoonacular
+
+        Returns: (recipes, complete) - complete is True when recipes is a full
+        answer (a cached result, or enough matches in our recipe table)
+        """
+        cached_recipes = self._get_cached_suggestions(cache_key)
+        if cached_recipes is not None:
+            return cached_recipes, True
+
+        # Serve straight from our recipe cache when it already has enough matches
+        local_recipes = self.fetch_local_meal_options(meal_type, targets, number)
+        if len(local_recipes) >= number:
+            suggestion_cache.set(cache_key, [recipe["id"] for recipe in local_recipes])
+            return local_recipes, True
+
+        return local_recipes, False
 
-        params = {
+    def _search_params(self, meal_type, targets, number):
+        """Query parameters for a Spoonacular complexSearch"""
+        return {
             "apiKey": self.api_key,
             "type": meal_type,
             "minCalories": targets["min_calories"],
@@ -122,130 +285,470 @@ class MealPlannerService:
             "number": number,
         }
 
-        try:
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            results = data.get("results", [])
+    def _store_search_results(self, meal_type, cache_key, results):
+        """
+        Save a page of complexSearch results and remember them for this window
 
-            # Process the recipes and save them to our database
-            processed_recipes = self._process_and_cache_recipes(results, meal_type)
+        Returns: list of recipe IDs, best fit first (not dictionaries - the result
+        is shared through single-flight with callers that want other fields)
+        """
+        # Process the recipes and save them to our database, best fit first
+        processed_recipes = self.rank_meal_options(
+            meal_type, self._process_and_cache_recipes(results, meal_type)
+        )
+        recipe_ids = [recipe["id"] for recipe in processed_recipes]
 
-            return processed_recipes
+        # Remember which recipes matched so similar requests skip the API
+        suggestion_cache.set(cache_key, recipe_ids)
 
-        except requests.RequestException as e:
-            print(f"ERROR: API request failed for {meal_type}: {str(e)}")
-            if hasattr(e, "response") and e.response is not None:
-                print(f"ERROR: Response content: {e.response.text}")
-            raise Exception(f"Error fetching recipes from Spoonacular: {str(e)}")
-        except Exception as e:
-            print(f"ERROR: Unexpected error for {meal_type}: {str(e)}")
-            raise Exception(f"Error processing recipes for {meal_type}: {str(e)}")
+        return recipe_ids
+
+    def snap_targets(self, targets):
+        """
+        Widen the min/max windows out to the nearest bucket boundaries
+
+        Goals that differ by a few calories then produce identical windows, so
+        their suggestions can be cached and shared.
+        Example with 25 kcal buckets: 412-618 calories becomes 400-625
+
+        targets: min/max dictionary from get_meal_targets()
+        Returns: dictionary with the same keys and snapped values
+        """
+        snapped = {}
+
+        for key, value in targets.items():
+            if key.endswith("calories"):
+                bucket = settings.SUGGESTION_BUCKET_CALORIES
+            else:
+                bucket = settings.SUGGESTION_BUCKET_GRAMS
+
+            if key.startswith("min_"):
+                snapped[key] = math.floor(value / bucket) * bucket
+            else:
+                snapped[key] = math.ceil(value / bucket) * bucket
+
+        return snapped
+
+    def suggestion_cache_key(self, meal_type, targets, number):
+        """Build the suggestion cache key for a meal type and (snapped) windows"""
+        windows = ":".join(str(targets[key]) for key in sorted(targets))
+        return f"{meal_type}:{number}:{windows}"
+
+    def _get_cached_suggestions(self, cache_key):
+        """
+        Load the recipes behind a cached suggestion result
+        Returns: list of recipe dictionaries, or None if nothing usable is cached
+        """
+        recipe_ids = suggestion_cache.get(cache_key)
+        # An empty list is a cached answer too (Spoonacular had nothing for this window)
+        if recipe_ids is None:
+            return None
+
+        recipes = self._load_suggestions(recipe_ids)
+
+        # A cached recipe has since been deleted - treat it as a miss
+        if len(recipes) != len(recipe_ids):
+            suggestion_cache.delete(cache_key)
+            return None
+
+        return recipes
+
+    def _load_suggestions(self, recipe_ids):
+        """
+        Load recipes by ID as suggestion dictionaries with this service's fields
+        Keeps the order of recipe_ids and skips recipes that no longer exist.
+        """
+        recipes = Recipe.objects.only(
+            *self.suggestion_fields, *FRESHNESS_FIELDS
+        ).in_bulk(recipe_ids)
+
+        self._refresh_if_stale(recipes.values())
+
+        return [
+            self._recipe_to_dict(recipes[recipe_id])
+            for recipe_id in recipe_ids
+            if recipe_id in recipes
+        ]
+
+    def fetch_local_meal_options(self, meal_type, targets, number=24):
+        """
+        Find recipes for a meal in our own Recipe table instead of Spoonacular
+
+        Uses the same min/max windows we would send to complexSearch, so each
+        filter is a range scan on the (meal_type, macro) indexes.
+
+        meal_type: 'breakfast', 'lunch', or 'dinner'
+        targets: min/max dictionary from get_meal_targets()
+        number: how many recipes we need
+        Returns: list of recipe dictionaries (may be shorter than number)
+        """
+        if not settings.MEAL_SUGGESTIONS_LOCAL_FIRST:
+            return []
+
+        # Best-fitting recipes first, then load just those rows
+        ranked_ids = [
+            recipe_id
+            for recipe_id, score in self.rank_candidate_pool(meal_type, targets, number)
+        ]
+        recipes = Recipe.objects.only(
+            *self.suggestion_fields, *FRESHNESS_FIELDS
+        ).in_bulk(ranked_ids)
+        self._refresh_if_stale(recipes.values())
+
+        return [
+            self._recipe_to_dict(recipes[recipe_id])
+            for recipe_id in ranked_ids
+            if recipe_id in recipes
+        ]
+
+    def _refresh_if_stale(self, recipes):
+        """Serve these recipes as they are, but refresh stale ones in the background"""
+        refresh_if_stale(
+            (recipe.spoonacular_id, recipe.fetched_at) for recipe in recipes
+        )
+
+    def _window_queryset(self, meal_type, targets):
+        """Cached recipes of this meal type inside every min/max macro window"""
+        return Recipe.objects.filter(
+            meal_type=meal_type,
+            calories__gte=targets["min_calories"],
+            calories__lte=targets["max_calories"],
+            proteins__gte=targets["min_proteins"],
+            proteins__lte=targets["max_proteins"],
+            fats__gte=targets["min_fats"],
+            fats__lte=targets["max_fats"],
+            carbohydrates__gte=targets["min_carbohydrates"],
+            carbohydrates__lte=targets["max_carbohydrates"],
+        )
+
+    def get_meal_target_vector(self, meal_type):
+        """
+        The exact macro amounts we aim for at this meal, in MACROS order
+        Example: 2000 calories/day at breakfast (25%) -> 500 calories
+        """
+        distribution = self.meal_distribution[meal_type]
+        return [self.daily_goals[macro] * distribution[macro] for macro in MACROS]
+
+    def rank_candidate_pool(self, meal_type, targets, k):
+        """
+        Rank the cached recipes inside a meal's windows by how well they hit its targets
+
+        Returns: list of (recipe id, score) tuples, best first
+        """
+        return self._rank_window(meal_type, targets, k)[0]
+
+    def best_fit_rows(self, meal_type, targets, k):
+        """
+        The k best-fitting (id, calories, proteins, fats, carbohydrates) rows
+        inside a meal's windows, best first
+        """
+        ranked, rows = self._rank_window(meal_type, targets, k)
+        return [rows[recipe_id] for recipe_id, score in ranked]
+
+    def _rank_window(self, meal_type, targets, k):
+        """
+        Find the k best-fitting recipes inside a meal's windows
+
+        Scoring is only ever done by ranking.rank_recipes. So that a big window isn't
+        loaded whole, rows are read from a narrow box around the meal's target first
+        (every macro within +/- band of its target - range scans on the
+        (meal_type, macro) indexes) and the box is doubled until nothing outside it
+        could make the top k: a row outside it is more than band off on some macro,
+        so its score is above sqrt(smallest weight) * band.
+
+        Returns: ([(recipe id, score), ...] best first, {recipe id: row})
+        """
+        if k <= 0:
+            return [], {}
+
+        window = self._window_queryset(meal_type, targets)
+        target = self.get_meal_target_vector(meal_type)
+        weights = settings.MACRO_FIT_WEIGHTS
+
+        # Macros with no weight don't affect the score, so they can't be narrowed
+        weighted = [
+            (macro, macro_target, weight)
+            for macro, macro_target, weight in zip(MACROS, target, weights)
+            if weight > 0
+        ]
+
+        band = INITIAL_CANDIDATE_BAND
+        while True:
+            box = {}
+            for macro, macro_target, weight in weighted:
+                # Avoid dividing by zero when a goal is 0 (same as macro_fit_scores)
+                scale = macro_target if macro_target > 0 else 1.0
+                low = macro_target - band * scale
+                high = macro_target + band * scale
+                # Only narrow where the box is tighter than the window itself
+                if low > targets[f"min_{macro}"]:
+                    box[f"{macro}__gte"] = low
+                if high < targets[f"max_{macro}"]:
+                    box[f"{macro}__lte"] = high
+
+            rows = {
+                row[0]: row for row in window.filter(**box).values_list("id", *MACROS)
+            }
+            ranked = rank_recipes(list(rows.values()), target, weights, k)
+
+            if not box:
+                return ranked, rows
+
+            min_weight = min(weight for macro, macro_target, weight in weighted)
+            if len(ranked) == k and ranked[-1][1] <= math.sqrt(min_weight) * band:
+                return ranked, rows
+
+            band *= 2
+
+    def rank_meal_options(self, meal_type, recipes):
+        """
+        Sort recipe dictionaries (e.g. fresh API results) by macro fit, best first
+
+        recipes: list of dictionaries with calories/proteins/fats/carbohydrates keys
+        """
+        rows = [
+            (index, *(recipe[macro] for macro in MACROS))
+            for index, recipe in enumerate(recipes)
+        ]
+        ranked = rank_recipes(
+            rows,
+            self.get_meal_target_vector(meal_type),
+            settings.MACRO_FIT_WEIGHTS,
+            len(rows),
+        )
+
+        return [recipes[index] for index, score in ranked]
+
+    def _recipe_to_dict(self, recipe):
+        """Convert a Recipe into the dictionary we send to the frontend"""
+        return {field: getattr(recipe, field) for field in self.suggestion_fields}
 
     def _process_and_cache_recipes(self, recipes_data, meal_type):
         """
         Take the raw recipe data from Spoonacular API and:
         1. Extract the nutrition information
-        2. Save recipes to our database (cache them)
+        2. Save recipes to our database (cache them) in one bulk upsert
         3. Return clean, processed recipe data
 
         recipes_data: list of recipe dictionaries from Spoonacular
         meal_type: 'breakfast', 'lunch', or 'dinner'
         Returns: list of cleaned recipe dictionaries
         """
-        processed_recipes = []
+        # Parse the whole page first, keyed by Spoonacular ID
+        # (keeps the API order and drops duplicates, which would break the upsert)
+        parsed_recipes = {}
 
-        # Loop through each recipe from the API response
         for recipe_data in recipes_data:
             try:
-                # Extract nutrition data from the complex API structure
-                nutrition = recipe_data.get("nutrition", {})
-
-                # Convert the nested nutrition list into a simple dictionary
-                # This transforms: [{"name": "Calories", "amount": 350}]
-                # Into: {"calories": 350}
-                nutrients = {}
-                for nutrient in nutrition.get("nutrients", []):
-                    nutrient_name = nutrient.get("name", "").lower()
-                    nutrient_amount = nutrient.get("amount", 0)
-                    nutrients[nutrient_name] = nutrient_amount
-
-                # Safely extract nutrition values with fallbacks
-                # Spoonacular API returns: "Protein", "Fat", "Carbohydrates", etc.
-                # We need to map these to our internal field names
-                calories = (
-                    nutrients.get("calories")
-                    or nutrients.get("energy")
-                    or nutrients.get("energy (kcal)")
-                    or 0
+                recipe_info = self._parse_recipe(recipe_data, meal_type)
+                parsed_recipes[recipe_info["spoonacular_id"]] = recipe_info
+            except Exception as e:
+                # If processing this recipe fails, skip it and continue with others
+                print(
+                    f"ERROR processing recipe {recipe_data.get('title', 'Unknown')}: {str(e)}"
                 )
+                continue
 
-                protein = nutrients.get("protein") or nutrients.get("proteins") or 0
+        if not parsed_recipes:
+            return []
 
-                fat = (
-                    nutrients.get("fat")
-                    or nutrients.get("total fat")
-                    or nutrients.get("fats")
-                    or 0
-                )
+        recipes = self._bulk_upsert_recipes(list(parsed_recipes.values()))
 
-                carbs = (
-                    nutrients.get("carbohydrates")
-                    or nutrients.get("carbs")
-                    or nutrients.get("total carbohydrates")
-                    or 0
-                )
+        # If the search already returned the full recipe (extendedIngredients),
+        # keep it so shopping lists don't need to download it again
+        information = {
+            recipe_data.get("id"): information_payload(recipe_data)
+            for recipe_data in recipes_data
+        }
+        try:
+            save_recipe_information(information, recipes)
+        except Exception as e:
+            print(f"ERROR saving recipe information: {str(e)}")
 
-                # Prepare all the recipe information for our database
-                recipe_info = {
-                    "spoonacular_id": recipe_data["id"],
-                    "title": recipe_data["title"],
-                    "image": recipe_data.get("image", ""),
-                    "ready_in_minutes": recipe_data.get("readyInMinutes", 0),
-                    "servings": recipe_data.get("servings", 1),
-                    "calories": calories,
-                    "proteins": protein,
-                    "fats": fat,
-                    "carbohydrates": carbs,
-                    "summary": recipe_data.get("summary", ""),
-                    "meal_type": meal_type,
-                    "ingredients": self._extract_ingredients(recipe_data),
-                }
+        # Create clean dictionaries to return to the frontend, in API order
+        return [
+            self._recipe_to_dict(recipes[spoonacular_id])
+            for spoonacular_id in parsed_recipes
+            if spoonacular_id in recipes
+        ]
 
-                # Save to database (or update if it already exists)
-                # This prevents duplicate recipes in our database
-                recipe, created = Recipe.objects.update_or_create(
-                    spoonacular_id=recipe_info[
-                        "spoonacular_id"
-                    ],  # Find by Spoonacular ID
-                    defaults=recipe_info,  # Update with new info
-                )
+    def _parse_recipe(self, recipe_data, meal_type):
+        """
+        Convert one Spoonacular recipe into the field values we store on Recipe
 
-                # Create a clean dictionary to return to the frontend
-                processed_recipes.append(
-                    {
-                        "id": recipe.id,
-                        "spoonacular_id": recipe.spoonacular_id,
-                        "title": recipe.title,
-                        "image": recipe.image,
-                        "ready_in_minutes": recipe.ready_in_minutes,
-                        "servings": recipe.servings,
-                        "calories": recipe.calories,
-                        "proteins": recipe.proteins,
-                        "fats": recipe.fats,
-                        "carbohydrates": recipe.carbohydrates,
-                        "summary": recipe.summary,
-                    }
-                )
+        recipe_data: one recipe dictionary from Spoonacular
+        meal_type: 'breakfast', 'lunch', or 'dinner'
+        Returns: dictionary of Recipe field values
+        """
+        # Extract nutrition data from the complex API structure
+        nutrition = recipe_data.get("nutrition", {})
 
-            except Exception as e:
-                # If processing this recipe fails, skip it and continue with others
-                print(
-                    f"ERROR processing recipe {recipe_data.get('title', 'Unknown')}: {str(e)}"
-                )
+        # Convert the nested nutrition list into a simple dictionary
+        # This transforms: [{"name": "Calories", "amount": 350}]
+        # Into: {"calories": 350}
+        nutrients = {}
+        for nutrient in nutrition.get("nutrients", []):
+            nutrient_name = nutrient.get("name", "").lower()
+            nutrient_amount = nutrient.get("amount", 0)
+            nutrients[nutrient_name] = nutrient_amount
+
+        # Safely extract nutrition values with fallbacks
+        # Spoonacular API returns: "Protein", "Fat", "Carbohydrates", etc.
+        # We need to map these to our internal field names
+        calories = (
+            nutrients.get("calories")
+            or nutrients.get("energy")
+            or nutrients.get("energy (kcal)")
+            or 0
+        )
+
+        protein = nutrients.get("protein") or nutrients.get("proteins") or 0
+
+        fat = (
+            nutrients.get("fat")
+            or nutrients.get("total fat")
+            or nutrients.get("fats")
+            or 0
+        )
+
+        carbs = (
+            nutrients.get("carbohydrates")
+            or nutrients.get("carbs")
+            or nutrients.get("total carbohydrates")
+            or 0
+        )
+
+        # Prepare all the recipe information for our database
+        return {
+            "spoonacular_id": recipe_data["id"],
+            "title": recipe_data["title"],
+            "image": recipe_data.get("image", ""),
+            "ready_in_minutes": recipe_data.get("readyInMinutes", 0),
+            "servings": recipe_data.get("servings", 1),
+            "calories": calories,
+            "proteins": protein,
+            "fats": fat,
+            "carbohydrates": carbs,
+            "summary": recipe_data.get("summary", ""),
+            "meal_type": meal_type,
+            "ingredients": self._extract_ingredients(recipe_data),
+        }
+
+    def _bulk_upsert_recipes(self, recipe_infos):
+        """
+        Save a page of parsed recipes with a single INSERT ... ON CONFLICT UPDATE
+        Recipes whose content hasn't changed since we last cached them are not
+        rewritten - only their fetched_at moves forward.
+
+        recipe_infos: list of dictionaries from _parse_recipe()
+        Returns: dictionary of {spoonacular_id: Recipe} for every recipe that was saved
+        """
+        fetched_at = timezone.now()
+        for recipe_info in recipe_infos:
+            recipe_info["content_hash"] = content_hash(recipe_info)
+            recipe_info["fetched_at"] = fetched_at
+
+        # updated_at is auto_now, so it is bumped on every rewrite (used for ETags)
+        update_fields = [
+            field for field in recipe_infos[0] if field != "spoonacular_id"
+        ] + ["updated_at"]
+        spoonacular_ids = [info["spoonacular_id"] for info in recipe_infos]
+
+        # Content hash and nutrition we already have for these recipes
+        previous = {
+            row[0]: row[1:]
+            for row in Recipe.objects.filter(
+                spoonacular_id__in=spoonacular_ids
+            ).values_list("spoonacular_id", "content_hash", *MACROS)
+        }
+        previous_macros = {
+            spoonacular_id: row[1:] for spoonacular_id, row in previous.items()
+        }
+
+        # Same content as last time - just record that it is fresh
+        unchanged_ids = [
+            recipe_info["spoonacular_id"]
+            for recipe_info in recipe_infos
+            if recipe_info["spoonacular_id"] in previous
+            and previous[recipe_info["spoonacular_id"]][0]
+            == recipe_info["content_hash"]
+        ]
+        if unchanged_ids:
+            Recipe.objects.filter(spoonacular_id__in=unchanged_ids).update(
+                fetched_at=fetched_at
+            )
+
+        changed_infos = [
+            recipe_info
+            for recipe_info in recipe_infos
+            if recipe_info["spoonacular_id"] not in unchanged_ids
+        ]
+
+        try:
+            # Savepoint, so a failed bulk write doesn't break an outer transaction
+            with transaction.atomic():
+                if changed_infos:
+                    Recipe.objects.bulk_create(
+                        [Recipe(**recipe_info) for recipe_info in changed_infos],
+                        update_conflicts=True,
+                        unique_fields=["spoonacular_id"],
+                        update_fields=update_fields,
+                    )
+        except Exception as e:
+            # One bad row fails the whole statement, so fall back to saving
+            # recipes one at a time - a bad payload then only drops that recipe
+            print(f"ERROR bulk saving recipes, saving one by one: {str(e)}")
+            for recipe_info in changed_infos:
+                try:
+                    Recipe.objects.update_or_create(
+                        spoonacular_id=recipe_info["spoonacular_id"],
+                        defaults=recipe_info,
+                    )
+                except Exception as e:
+                    print(
+                        f"ERROR saving recipe {recipe_info.get('title', 'Unknown')}: {str(e)}"
+                    )
+                    continue
+
+        # Look up the saved rows (and their database IDs) in one query
+        recipes = (
+            Recipe.objects.filter(spoonacular_id__in=spoonacular_ids)
+            .only(*self.suggestion_fields)
+            .in_bulk(field_name="spoonacular_id")
+        )
+
+        # Keep the normalized ingredient rows in step with what we just wrote
+        # (only recipes we already had can have old rows to replace)
+        ingredients_by_recipe = {}
+        replaced_recipe_ids = []
+        for recipe_info in changed_infos:
+            recipe = recipes.get(recipe_info["spoonacular_id"])
+            if recipe is None:
                 continue
+            ingredients_by_recipe[recipe.id] = recipe_info["ingredients"]
+            if recipe_info["spoonacular_id"] in previous:
+                replaced_recipe_ids.append(recipe.id)
+        try:
+            save_recipe_ingredients(ingredients_by_recipe, replaced_recipe_ids)
+        except Exception as e:
+            print(f"ERROR saving recipe ingredients: {str(e)}")
+
+        # Meal plans using a recipe whose nutrition changed need new stored totals
+        changed_ids = [
+            recipe.id
+            for spoonacular_id, recipe in recipes.items()
+            if spoonacular_id in previous_macros
+            and previous_macros[spoonacular_id]
+            != tuple(getattr(recipe, macro) for macro in MACROS)
+        ]
+        if changed_ids:
+            MealPlan.objects.filter(
+                Q(breakfast_id__in=changed_ids)
+                | Q(lunch_id__in=changed_ids)
+                | Q(dinner_id__in=changed_ids)
+            ).recalculate_totals()
 
-        return processed_recipes
+        return recipes
 
     def _extract_ingredients(self, recipe_data):
         """Extract ingredients from recipe data"""
@@ -261,6 +764,7 @@ class MealPlannerService:
                         "amount": ing.get("amount", 0),
                         "unit": ing.get("unit", ""),
                         "original": ing.get("original", ""),
+                        "aisle": ing.get("aisle", ""),
                     }
                 )
         elif "ingredients" in recipe_data:
@@ -275,6 +779,7 @@ class MealPlannerService:
                             "amount": 0,
                             "unit": "",
                             "original": ing,
+                            "aisle": "",
                         }
                     )
                 elif isinstance(ing, dict):
@@ -286,24 +791,98 @@ class MealPlannerService:
                             "amount": ing.get("amount", 0),
                             "unit": ing.get("unit", ""),
                             "original": ing.get("original", ing.get("name", "")),
+                            "aisle": ing.get("aisle", ""),
                         }
                     )
 
         return ingredients
 
-    def get_all_meal_options(self):
-        """Get options for all three meals"""
-        meal_options = {}
+    def get_all_meal_options(self, concurrent=None):
+        """
+        Get options for all three meals
 
-        for meal_type in ["breakfast", "lunch", "dinner"]:
-            try:
-                meal_options[meal_type] = self.fetch_meal_options(meal_type)
-            except Exception as e:
-                print(f"Error fetching {meal_type} options: {str(e)}")
-                meal_options[meal_type] = []
+        concurrent: run the three searches in parallel threads so the request
+        takes as long as the slowest meal instead of the sum of all three.
+        Defaults to the MEAL_SUGGESTIONS_CONCURRENT setting.
+        """
+        if concurrent is None:
+            concurrent = settings.MEAL_SUGGESTIONS_CONCURRENT
+
+        self.meal_timings = {}
+        started = time.perf_counter()
+
+        if concurrent:
+            with ThreadPoolExecutor(max_workers=len(MEAL_TYPES)) as executor:
+                futures = {
+                    meal_type: executor.submit(self._threaded_meal_options, meal_type)
+                    for meal_type in MEAL_TYPES
+                }
+                # Each future already swallows its own errors, so this only
+                # waits for the slowest meal to finish
+                meal_options = {
+                    meal_type: future.result() for meal_type, future in futures.items()
+                }
+        else:
+            meal_options = {
+                meal_type: self._timed_meal_options(meal_type)
+                for meal_type in MEAL_TYPES
+            }
+
+        self.meal_timings["total"] = round(time.perf_counter() - started, 3)
+        logger.info(
+            f"Meal options fetched ({'concurrent' if concurrent else 'sequential'}): "
+            f"{self.meal_timings}"
+        )
 
         return meal_options
 
+    async def aget_all_meal_options(self):
+        """Async version of get_all_meal_options - all three searches run at once"""
+        self.meal_timings = {}
+        started = time.perf_counter()
+
+        results = await asyncio.gather(
+            *(self._atimed_meal_options(meal_type) for meal_type in MEAL_TYPES)
+        )
+
+        self.meal_timings["total"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Meal options fetched (async): {self.meal_timings}")
+
+        return dict(zip(MEAL_TYPES, results))
+
+    async def _atimed_meal_options(self, meal_type):
+        """Async version of _timed_meal_options"""
+        started = time.perf_counter()
+        try:
+            return await self.afetch_meal_options(meal_type)
+        except Exception as e:
+            print(f"Error fetching {meal_type} options: {str(e)}")
+            return []
+        finally:
+            self.meal_timings[meal_type] = round(time.perf_counter() - started, 3)
+
+    def _timed_meal_options(self, meal_type):
+        """
+        Fetch options for one meal, recording how long it took
+        A failed meal returns an empty list so the other meals still come back
+        """
+        started = time.perf_counter()
+        try:
+            return self.fetch_meal_options(meal_type)
+        except Exception as e:
+            print(f"Error fetching {meal_type} options: {str(e)}")
+            return []
+        finally:
+            self.meal_timings[meal_type] = round(time.perf_counter() - started, 3)
+
+    def _threaded_meal_options(self, meal_type):
+        """Run _timed_meal_options inside a worker thread"""
+        try:
+            return self._timed_meal_options(meal_type)
+        finally:
+            # Each worker thread opens its own DB connection; close it so it isn't leaked
+            connections.close_all()
+
     def calculate_meal_totals(self, breakfast_id=None, lunch_id=None, dinner_id=None):
         """Calculate total macros for selected meals"""
         total_macros = {"calories": 0, "proteins": 0, "fats": 0, "carbohydrates": 0}
@@ -313,7 +892,7 @@ class MealPlannerService:
         for meal_id in meal_ids:
             if meal_id:
                 try:
-                    recipe = Recipe.objects.get(id=meal_id)
+                    recipe = Recipe.objects.only(*MACROS).get(id=meal_id)
                     total_macros["calories"] += recipe.calories
                     total_macros["proteins"] += recipe.proteins
                     total_macros["fats"] += recipe.fats
@@ -321,7 +900,27 @@ class MealPlannerService:
                 except Recipe.DoesNotExist:
                     continue
 
-        # Calculate how close we are to daily goals
+        return {
+            "totals": total_macros,
+            "daily_goals": self.daily_goals,
+            "goal_percentages": self.get_goal_percentages(total_macros),
+        }
+
+    def get_plan_totals(self, meal_plan):
+        """
+        Same result as calculate_meal_totals, but read from the totals stored on
+        the MealPlan instead of loading each recipe
+        """
+        total_macros = {macro: getattr(meal_plan, f"total_{macro}") for macro in MACROS}
+
+        return {
+            "totals": total_macros,
+            "daily_goals": self.daily_goals,
+            "goal_percentages": self.get_goal_percentages(total_macros),
+        }
+
+    def get_goal_percentages(self, total_macros):
+        """Calculate how close macro totals are to the daily goals"""
         goal_percentages = {}
         for nutrient in total_macros:
             daily_goal = self.daily_goals[nutrient]
@@ -332,8 +931,299 @@ class MealPlannerService:
             else:
                 goal_percentages[f"{nutrient}_percentage"] = 0
 
+        return goal_percentages
+
+    def bulk_upsert_meal_plans(self, account, entries):
+        """
+        Create or update meal plans for many dates at once
+
+        Works like MealPlanView.post for each date (slots left out of an entry keep
+        their current recipe, a slot set to None is cleared) but validates every
+        recipe with one in_bulk query and writes all rows with one upsert.
+
+        entries: list of {"date": date, "breakfast_id"/"lunch_id"/"dinner_id": id}
+        Returns: list of saved plans with their totals, in entry order
+        Raises: ValueError if any recipe ID doesn't exist
+        """
+        slots = [f"{meal_type}_id" for meal_type in MEAL_TYPES]
+
+        # Current slots for these dates, so partial updates keep the other meals
+        existing = {
+            plan["date"]: plan
+            for plan in MealPlan.objects.filter(
+                account=account, date__in=[entry["date"] for entry in entries]
+            ).values("date", *slots)
+        }
+
+        plans = []
+        for entry in entries:
+            plan = {slot: existing.get(entry["date"], {}).get(slot) for slot in slots}
+            plan.update({slot: entry[slot] for slot in slots if slot in entry})
+            plan["date"] = entry["date"]
+            plans.append(plan)
+
+        # Validate requested recipes and load macros for every slot in one query
+        requested_ids = {
+            entry[slot] for entry in entries for slot in slots if entry.get(slot)
+        }
+        all_ids = {plan[slot] for plan in plans for slot in slots if plan[slot]}
+        recipes = Recipe.objects.only("id", *MACROS).in_bulk(all_ids)
+
+        missing_ids = sorted(requested_ids - set(recipes))
+        if missing_ids:
+            raise ValueError(f"Recipes not found: {missing_ids}")
+
+        meal_plans = []
+        for plan in plans:
+            meals = [recipes[plan[slot]] for slot in slots if plan[slot] in recipes]
+            plan["totals"] = {
+                macro: sum(getattr(meal, macro) for meal in meals) for macro in MACROS
+            }
+            meal_plans.append(
+                MealPlan(
+                    account=account,
+                    date=plan["date"],
+                    **{slot: plan[slot] for slot in slots},
+                    **{f"total_{macro}": plan["totals"][macro] for macro in MACROS},
+                )
+            )
+
+        MealPlan.objects.bulk_create(
+            meal_plans,
+            update_conflicts=True,
+            unique_fields=["account", "date"],
+            update_fields=[
+                *MEAL_TYPES,
+                *(f"total_{macro}" for macro in MACROS),
+                "updated_at",
+            ],
+        )
+
+        return [
+            {
+                "date": plan["date"],
+                **{slot: plan[slot] for slot in slots},
+                "totals": {
+                    "totals": plan["totals"],
+                    "daily_goals": self.daily_goals,
+                    "goal_percentages": self.get_goal_percentages(plan["totals"]),
+                },
+            }
+            for plan in plans
+        ]
+
+    def get_range_totals(self, account, start_date, end_date):
+        """
+        Nutrition totals for every planned day in a date range, plus the whole period
+
+        Reads the stored daily totals on MealPlan, so a month of history is one
+        query over a single narrow table (no recipe joins).
+
+        Returns: dictionary with "days" (one entry per MealPlan) and "period" totals
+        """
+        total_fields = [f"total_{macro}" for macro in MACROS]
+        rows = (
+            MealPlan.objects.filter(
+                account=account, date__gte=start_date, date__lte=end_date
+            )
+            .order_by("date")
+            .values("date", *total_fields)
+        )
+
+        days = []
+        period_totals = {macro: 0 for macro in MACROS}
+
+        for row in rows:
+            totals = {macro: row[f"total_{macro}"] for macro in MACROS}
+            days.append(
+                {
+                    "date": row["date"],
+                    "totals": totals,
+                    "goal_percentages": self.get_goal_percentages(totals),
+                }
+            )
+            for macro in MACROS:
+                period_totals[macro] += totals[macro]
+
+        # Average planned day compared against the daily goals
+        daily_average = {
+            macro: round(period_totals[macro] / len(days), 1) if days else 0
+            for macro in MACROS
+        }
+
         return {
-            "totals": total_macros,
+            "days": days,
+            "period": {
+                "start_date": start_date,
+                "end_date": end_date,
+                "days_planned": len(days),
+                "totals": period_totals,
+                "daily_average": daily_average,
+                "goal_percentages": self.get_goal_percentages(daily_average),
+            },
             "daily_goals": self.daily_goals,
-            "goal_percentages": goal_percentages,
         }
+
+    def get_candidate_rows(self, meal_type, recipe_ids=None, pool_size=200):
+        """
+        Load (id, calories, proteins, fats, carbohydrates) rows for one meal's candidates
+
+        meal_type: 'breakfast', 'lunch', or 'dinner'
+        recipe_ids: use exactly these recipes, or None to use the best-fitting
+                    cached recipes inside the meal's windows
+        pool_size: how many recipes to keep when picking from the cache
+        """
+        if recipe_ids is not None:
+            return list(
+                Recipe.objects.filter(id__in=recipe_ids).values_list("id", *MACROS)
+            )
+
+        # Keep only the pool_size best fits for this meal
+        targets = self.snap_targets(self.get_meal_targets(meal_type))
+        return self.best_fit_rows(meal_type, targets, pool_size)
+
+    def optimize_day_plans(self, candidate_ids=None, top_n=5, pool_size=200):
+        """
+        Pick the breakfast+lunch+dinner combinations that best hit the daily goals
+
+        candidate_ids: optional {meal_type: [recipe ids]} to choose from; meals not
+                       given use the best-fitting cached recipes for that meal
+        top_n: how many plans to return
+        pool_size: candidates per meal when picking from the cache
+        Returns: list of plans, best first, each ready to post to MealPlanView
+        """
+        candidate_ids = candidate_ids or {}
+
+        pools = {}
+        for meal_type in MEAL_TYPES:
+            pools[meal_type] = self.get_candidate_rows(
+                meal_type, candidate_ids.get(meal_type), pool_size
+            )
+            if not pools[meal_type]:
+                raise ValueError(f"No candidate recipes found for {meal_type}")
+
+        plans = best_day_plans(
+            pools["breakfast"],
+            pools["lunch"],
+            pools["dinner"],
+            [self.daily_goals[macro] for macro in MACROS],
+            settings.MACRO_FIT_WEIGHTS,
+            top_n,
+        )
+
+        return self._describe_plans(plans, pools)
+
+    def _describe_plans(self, plans, pools):
+        """
+        Turn (breakfast_id, lunch_id, dinner_id, score) tuples into response dictionaries
+
+        pools: the {meal_type: rows} the plans were picked from, so totals need
+               no extra queries
+        """
+        macros_by_id = {
+            row[0]: dict(zip(MACROS, row[1:]))
+            for rows in pools.values()
+            for row in rows
+        }
+        plan_recipe_ids = {recipe_id for plan in plans for recipe_id in plan[:3]}
+        recipes = Recipe.objects.only("id", "title").in_bulk(plan_recipe_ids)
+
+        results = []
+        for breakfast_id, lunch_id, dinner_id, score in plans:
+            total_macros = {
+                macro: sum(
+                    macros_by_id[recipe_id][macro]
+                    for recipe_id in (breakfast_id, lunch_id, dinner_id)
+                )
+                for macro in MACROS
+            }
+
+            results.append(
+                {
+                    "breakfast_id": breakfast_id,
+                    "lunch_id": lunch_id,
+                    "dinner_id": dinner_id,
+                    "titles": {
+                        meal_type: recipes[recipe_id].title
+                        for meal_type, recipe_id in zip(
+                            MEAL_TYPES, (breakfast_id, lunch_id, dinner_id)
+                        )
+                    },
+                    "score": round(score, 4),
+                    "totals": total_macros,
+                    "goal_percentages": self.get_goal_percentages(total_macros),
+                }
+            )
+
+        return results
+
+    def generate_week_plan(self, account, start_date, days=7, pool_size=200):
+        """
+        Plan breakfast, lunch and dinner for several days in one go
+
+        Candidate pools are loaded once for the whole period (topped up from
+        Spoonacular only if a meal has fewer candidates than days), recipes are
+        assigned without repeats, and every MealPlan row is written with a single
+        bulk upsert on (account, date).
+
+        account: whose meal plans to write
+        start_date: first day to plan (a date object)
+        days: how many days to plan
+        Returns: list of plans (one per day, with its date), or [] if no recipes
+        """
+        pools = {}
+        for meal_type in MEAL_TYPES:
+            pools[meal_type] = self.get_candidate_rows(meal_type, pool_size=pool_size)
+
+            if len(pools[meal_type]) < days:
+                # Not enough cached recipes yet - one upstream search for this meal
+                try:
+                    self.fetch_meal_options(meal_type, number=max(24, days))
+                except Exception as e:
+                    print(f"Error fetching {meal_type} options: {str(e)}")
+                pools[meal_type] = self.get_candidate_rows(
+                    meal_type, pool_size=pool_size
+                )
+
+        plans = plan_days(
+            pools["breakfast"],
+            pools["lunch"],
+            pools["dinner"],
+            [self.daily_goals[macro] for macro in MACROS],
+            settings.MACRO_FIT_WEIGHTS,
+            days,
+        )
+        if not plans:
+            return []
+
+        dates = [start_date + timedelta(days=offset) for offset in range(len(plans))]
+
+        results = self._describe_plans(plans, pools)
+
+        MealPlan.objects.bulk_create(
+            [
+                MealPlan(
+                    account=account,
+                    date=plan_date,
+                    breakfast_id=result["breakfast_id"],
+                    lunch_id=result["lunch_id"],
+                    dinner_id=result["dinner_id"],
+                    **{f"total_{macro}": result["totals"][macro] for macro in MACROS},
+                )
+                for plan_date, result in zip(dates, results)
+            ],
+            update_conflicts=True,
+            unique_fields=["account", "date"],
+            update_fields=[
+                "breakfast",
+                "lunch",
+                "dinner",
+                *(f"total_{macro}" for macro in MACROS),
+                "updated_at",
+            ],
+        )
+
+        for plan_date, result in zip(dates, results):
+            result["date"] = plan_date
+
+        return results
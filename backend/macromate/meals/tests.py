@@ -1,3 +1,545 @@
-from django.test import TestCase
+import random
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import Account
+from meal_planning.models import MacroGoal
+from .cache import TwoTierCache, recipe_cache, recipe_cache_key
+from .freshness import BackgroundRefresher, background_refresher, refresh_recipes
+from .models import MealPlan, Recipe
+from .ranking import MACROS, best_day_plans, plan_days, rank_recipes, top_k_indices
+from .services import MealPlannerService
+
+
+class RankingLimitTests(SimpleTestCase):
+    """Non-positive k / top_n must mean "nothing", not "almost everything" """
+
+    def test_top_k_indices_non_positive_k(self):
+        scores = np.array([3.0, 1.0, 2.0])
+        self.assertEqual(len(top_k_indices(scores, 0)), 0)
+        self.assertEqual(len(top_k_indices(scores, -2)), 0)
+
+    def test_best_day_plans_non_positive_top_n(self):
+        rows = [(i, 500, 40, 15, 60) for i in range(1, 11)]
+        goal = [2000, 150, 60, 200]
+        weights = [1, 1, 1, 1]
+        self.assertEqual(best_day_plans(rows, rows, rows, goal, weights, top_n=0), [])
+        self.assertEqual(best_day_plans(rows, rows, rows, goal, weights, top_n=-3), [])
+
+
+class PlanDaysTests(SimpleTestCase):
+    goal = [2000, 150, 60, 200]
+    weights = [1, 1, 1, 1]
+
+    def rows(self, first_id, count, calories):
+        return [
+            (recipe_id, calories, 45, 18, 65)
+            for recipe_id in range(first_id, first_id + count)
+        ]
+
+    def test_no_repeats_with_enough_recipes(self):
+        plans = plan_days(
+            self.rows(1, 7, 500),
+            self.rows(101, 7, 700),
+            self.rows(201, 7, 800),
+            self.goal,
+            self.weights,
+            7,
+        )
+        self.assertEqual(len(plans), 7)
+        self.assertEqual(len({plan[0] for plan in plans}), 7)
+
+    def test_single_recipe_pool_still_plans_every_day(self):
+        plans = plan_days(
+            self.rows(1, 1, 500),
+            self.rows(101, 5, 700),
+            self.rows(201, 5, 800),
+            self.goal,
+            self.weights,
+            7,
+        )
+        self.assertEqual(len(plans), 7)
+        self.assertEqual({plan[0] for plan in plans}, {1})
+        # The other meals still don't repeat on consecutive days
+        for previous, plan in zip(plans, plans[1:]):
+            self.assertNotEqual(previous[1], plan[1])
+            self.assertNotEqual(previous[2], plan[2])
+
+
+class CandidateRankingTests(TestCase):
+    """Ranking through the narrowed box must match scoring the whole window"""
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(7)
+        Recipe.objects.bulk_create(
+            Recipe(
+                spoonacular_id=spoonacular_id,
+                title=f"Recipe {spoonacular_id}",
+                ready_in_minutes=10,
+                meal_type="breakfast",
+                calories=rng.uniform(250, 750),
+                proteins=rng.uniform(20, 60),
+                fats=rng.uniform(5, 30),
+                carbohydrates=rng.uniform(30, 110),
+            )
+            for spoonacular_id in range(1, 501)
+        )
+
+    def test_matches_ranking_the_whole_window(self):
+        planner = MealPlannerService(
+            MacroGoal(calories=2000, proteins=150, fats=60, carbohydrates=200)
+        )
+        targets = planner.snap_targets(planner.get_meal_targets("breakfast"))
+        window_rows = list(
+            planner._window_queryset("breakfast", targets).values_list("id", *MACROS)
+        )
+
+        for k in [1, 10, 50, len(window_rows) + 5]:
+            expected = rank_recipes(
+                window_rows,
+                planner.get_meal_target_vector("breakfast"),
+                settings.MACRO_FIT_WEIGHTS,
+                k,
+            )
+            self.assertEqual(
+                planner.rank_candidate_pool("breakfast", targets, k), expected
+            )
+            self.assertEqual(
+                [row[0] for row in planner.best_fit_rows("breakfast", targets, k)],
+                [recipe_id for recipe_id, score in expected],
+            )
+
+
+class MealPlanOptimizeViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create_user(
+            "optimizer@example.com", "password", first_name="Opt", last_name="Imizer"
+        )
+        MacroGoal.objects.create(
+            account=cls.account, calories=2000, proteins=150, fats=60, carbohydrates=200
+        )
+
+        spoonacular_id = 0
+        for meal_type, calories in [
+            ("breakfast", 500),
+            ("lunch", 700),
+            ("dinner", 800),
+        ]:
+            for offset in range(10):
+                spoonacular_id += 1
+                Recipe.objects.create(
+                    spoonacular_id=spoonacular_id,
+                    title=f"{meal_type} {offset}",
+                    ready_in_minutes=10,
+                    calories=calories + offset,
+                    proteins=45,
+                    fats=18,
+                    carbohydrates=65,
+                    meal_type=meal_type,
+                )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.account)
+
+    def test_negative_top_n_is_clamped(self):
+        response = self.client.post(
+            "/api/v1/meals/plan/optimize/", {"top_n": -3}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["plans"]), 1)
+
+    def test_negative_pool_size_is_clamped(self):
+        response = self.client.post(
+            "/api/v1/meals/plan/optimize/",
+            {"top_n": 2, "pool_size": -5},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["plans"]), 1)
+
+
+class RecipeDetailFreshnessTests(TestCase):
+    """An unchanged refresh must not leave a stale fetched_at in the detail cache"""
+
+    def setUp(self):
+        cache.clear()
+        recipe_cache.local.clear()
+        self.account = Account.objects.create_user(
+            "fresh@example.com", "password", first_name="Fre", last_name="Sh"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.account)
+
+        self.recipe_data = {
+            "id": 101,
+            "title": "Oats",
+            "readyInMinutes": 5,
+            "servings": 1,
+            "nutrition": {
+                "nutrients": [
+                    {"name": "Calories", "amount": 400},
+                    {"name": "Protein", "amount": 20},
+                    {"name": "Fat", "amount": 10},
+                    {"name": "Carbohydrates", "amount": 60},
+                ]
+            },
+        }
+        planner = MealPlannerService(
+            MacroGoal(calories=0, proteins=0, fats=0, carbohydrates=0)
+        )
+        planner._process_and_cache_recipes([self.recipe_data], "breakfast")
+        self.recipe = Recipe.objects.get(spoonacular_id=101)
+
+    @override_settings(RECIPE_STALE_WHILE_REVALIDATE=True)
+    def test_unchanged_refresh_stops_further_refreshes(self):
+        Recipe.objects.filter(id=self.recipe.id).update(
+            fetched_at=timezone.now() - timedelta(days=30)
+        )
+        url = f"/api/v1/meals/recipe/{self.recipe.id}/"
+
+        with mock.patch.object(background_refresher, "schedule") as schedule:
+            # Caches the detail with the old fetched_at, and asks for a refresh
+            self.client.get(url)
+            self.assertEqual(schedule.call_count, 1)
+
+            # The refresh comes back with the same content
+            response = mock.Mock()
+            response.json.return_value = [self.recipe_data]
+            with mock.patch(
+                "macromate.http_client.HttpClient.get", return_value=response
+            ):
+                refresh_recipes([101])
+
+            for _ in range(3):
+                self.client.get(url)
+            self.assertEqual(schedule.call_count, 1)
+
+
+def recipe_data(spoonacular_id, title="Oats", calories=400):
+    """A complexSearch / informationBulk recipe as Spoonacular returns it"""
+    return {
+        "id": spoonacular_id,
+        "title": title,
+        "readyInMinutes": 5,
+        "servings": 1,
+        "nutrition": {
+            "nutrients": [
+                {"name": "Calories", "amount": calories},
+                {"name": "Protein", "amount": 20},
+                {"name": "Fat", "amount": 10},
+                {"name": "Carbohydrates", "amount": 60},
+            ]
+        },
+    }
+
+
+class BackgroundRefresherTests(SimpleTestCase):
+    """Recipes whose refresh failed back off instead of being retried on every hit"""
+
+    def setUp(self):
+        self.refresher = BackgroundRefresher(retry_after=300)
+        # Run refreshes right away instead of in a worker thread
+        self.refresher._executor = mock.Mock(
+            submit=lambda function, *args: function(*args)
+        )
+
+    def schedule_at(self, now, spoonacular_ids):
+        with mock.patch("meals.freshness.time.monotonic", return_value=now):
+            self.refresher.schedule(spoonacular_ids)
+
+    @mock.patch("meals.freshness.refresh_recipes", side_effect=Exception("429"))
+    def test_failed_recipes_wait_with_a_growing_backoff(self, refresh):
+        self.schedule_at(1000, [1, 2])
+        self.schedule_at(1100, [1, 2])
+        self.assertEqual(refresh.call_count, 1)
+
+        # Retried after 5 minutes, then not for another 10
+        self.schedule_at(1300, [1, 2])
+        self.assertEqual(refresh.call_count, 2)
+        self.schedule_at(1800, [1, 2])
+        self.assertEqual(refresh.call_count, 2)
+        self.schedule_at(1900, [1, 2])
+        self.assertEqual(refresh.call_count, 3)
+
+        # Other recipes aren't held back
+        self.schedule_at(1900, [3])
+        self.assertEqual(refresh.call_count, 4)
+
+    @mock.patch("meals.freshness.refresh_recipes")
+    def test_success_clears_the_backoff(self, refresh):
+        refresh.side_effect = Exception("503")
+        self.schedule_at(1000, [1])
+        refresh.side_effect = None
+        self.schedule_at(1300, [1])
+        self.schedule_at(1301, [1])
+        self.assertEqual(refresh.call_count, 3)
+
+
+class RecipeDetailCacheTests(TestCase):
+    """A rewritten recipe must not be served from another process's cache"""
+
+    def setUp(self):
+        cache.clear()
+        recipe_cache.local.clear()
+        self.account = Account.objects.create_user(
+            "detail@example.com", "password", first_name="De", last_name="Tail"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.account)
+        self.planner = MealPlannerService(
+            MacroGoal(calories=0, proteins=0, fats=0, carbohydrates=0)
+        )
+
+    def save(self, title):
+        recipe_info = self.planner._parse_recipe(recipe_data(1, title), "breakfast")
+        return self.planner._bulk_upsert_recipes([recipe_info])[1]
+
+    def test_rewrite_is_visible_through_a_second_cache(self):
+        recipe = self.save("Old title")
+        url = f"/api/v1/meals/recipe/{recipe.id}/"
+        first = self.client.get(url)
+
+        # Another worker: its own local tier, the same Django cache
+        other_worker = TwoTierCache(
+            "recipes", max_entries=16, local_ttl=3600, shared_ttl=3600
+        )
+        self.assertEqual(
+            other_worker.get(recipe_cache_key(recipe.id, recipe.updated_at))["title"],
+            "Old title",
+        )
+
+        self.save("New title")
+
+        with mock.patch("meals.views.recipe_cache", other_worker):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first.headers["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["title"], "New title")
+        self.assertNotEqual(response.headers["ETag"], first.headers["ETag"])
+
+
+class BulkUpsertRecipesTests(TestCase):
+    """MealPlannerService._bulk_upsert_recipes"""
+
+    def setUp(self):
+        self.planner = MealPlannerService(
+            MacroGoal(calories=0, proteins=0, fats=0, carbohydrates=0)
+        )
+
+    def upsert(self, *recipes):
+        recipe_infos = [
+            self.planner._parse_recipe(recipe, "breakfast") for recipe in recipes
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            saved = self.planner._bulk_upsert_recipes(recipe_infos)
+        recipe_writes = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith(("INSERT", "UPDATE"))
+            and '"meals_recipe"' in query["sql"].split("(")[0]
+        ]
+        return saved, recipe_writes
+
+    def test_mixed_batch_is_one_upsert(self):
+        self.upsert(recipe_data(1, "Old title"))
+        created_at = Recipe.objects.get(spoonacular_id=1).created_at
+
+        saved, recipe_writes = self.upsert(
+            recipe_data(1, "New title"), recipe_data(2, "Pancakes")
+        )
+
+        self.assertEqual(len(recipe_writes), 1)
+        self.assertEqual(set(saved), {1, 2})
+        existing = Recipe.objects.get(spoonacular_id=1)
+        self.assertEqual(existing.title, "New title")
+        self.assertEqual(existing.created_at, created_at)
+        self.assertEqual(Recipe.objects.get(spoonacular_id=2).title, "Pancakes")
+
+    def test_unchanged_content_only_moves_fetched_at(self):
+        self.upsert(recipe_data(1))
+        before = Recipe.objects.get(spoonacular_id=1)
+
+        saved, recipe_writes = self.upsert(recipe_data(1))
+
+        # Just the fetched_at UPDATE - the row isn't rewritten
+        self.assertEqual(len(recipe_writes), 1)
+        self.assertTrue(recipe_writes[0].startswith("UPDATE"))
+        after = Recipe.objects.get(spoonacular_id=1)
+        self.assertEqual(after.updated_at, before.updated_at)
+        self.assertGreater(after.fetched_at, before.fetched_at)
+        self.assertEqual(set(saved), {1})
+
+    def test_bad_row_falls_back_to_one_by_one(self):
+        # A recipe without a title fails the whole bulk statement...
+        with mock.patch("builtins.print"):
+            saved, recipe_writes = self.upsert(
+                recipe_data(1, "Oats"),
+                recipe_data(2, None),
+                recipe_data(3, "Pancakes"),
+            )
+
+        # ...but only the bad recipe is lost
+        self.assertEqual(set(saved), {1, 3})
+        self.assertEqual(
+            set(Recipe.objects.values_list("spoonacular_id", flat=True)), {1, 3}
+        )
+
+
+class TwoTierCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cache = TwoTierCache("test", max_entries=2, local_ttl=60, shared_ttl=3600)
+
+    def test_local_tier_evicts_least_recently_used(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")  # "b" is now the least recently used
+        self.cache.set("c", 3)
+
+        self.assertIsNone(self.cache.local.get("b"))
+        self.assertEqual(self.cache.local.get("a"), 1)
+        self.assertEqual(self.cache.local.get("c"), 3)
+        # Still in the shared tier, and comes back into process memory from there
+        self.assertEqual(self.cache.get("b"), 2)
+        self.assertEqual(self.cache.local.get("b"), 2)
+
+    def test_local_entries_expire_after_local_ttl(self):
+        with mock.patch("meals.cache.time.monotonic", return_value=1000.0):
+            self.cache.set("a", 1)
+        with mock.patch("meals.cache.time.monotonic", return_value=1059.0):
+            self.assertEqual(self.cache.local.get("a"), 1)
+        with mock.patch("meals.cache.time.monotonic", return_value=1061.0):
+            self.assertIsNone(self.cache.local.get("a"))
+
+        cache.delete("test:a")
+        self.assertIsNone(self.cache.get("a"))
+
+
+class SnapTargetsTests(SimpleTestCase):
+    def test_nearby_goals_share_a_cache_key(self):
+        keys = set()
+        for calories, proteins in [(1980, 150), (1990, 151)]:
+            planner = MealPlannerService(
+                MacroGoal(
+                    calories=calories, proteins=proteins, fats=60, carbohydrates=200
+                )
+            )
+            targets = planner.snap_targets(planner.get_meal_targets("breakfast"))
+            keys.add(planner.suggestion_cache_key("breakfast", targets, 24))
+
+        self.assertEqual(len(keys), 1)
+
+
+class MealPlanViewTestCase(TestCase):
+    """An account with a goal and one recipe per meal"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.account = Account.objects.create_user(
+            "planner@example.com", "password", first_name="Plan", last_name="Ner"
+        )
+        MacroGoal.objects.create(
+            account=cls.account, calories=2000, proteins=150, fats=60, carbohydrates=200
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                spoonacular_id=spoonacular_id,
+                title=f"Recipe {spoonacular_id}",
+                ready_in_minutes=10,
+                calories=calories,
+                proteins=30,
+                fats=15,
+                carbohydrates=60,
+            )
+            for spoonacular_id, calories in [(1, 400), (2, 600), (3, 800)]
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.account)
+
+
+class MealPlanBulkViewTests(MealPlanViewTestCase):
+    def test_creates_and_updates_in_one_call(self):
+        breakfast, lunch, dinner = self.recipes
+        MealPlan.objects.create(
+            account=self.account, date="2025-03-01", breakfast=breakfast
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/v1/meals/plan/bulk/",
+                {
+                    "plans": [
+                        {"date": "2025-03-01", "lunch_id": lunch.id},
+                        {"date": "2025-03-02", "dinner_id": dinner.id},
+                    ]
+                },
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, 200)
+        plan_writes = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('INSERT INTO "meals_mealplan"')
+        ]
+        self.assertEqual(len(plan_writes), 1)
+
+        updated = MealPlan.objects.get(account=self.account, date="2025-03-01")
+        self.assertEqual(
+            (updated.breakfast_id, updated.lunch_id), (breakfast.id, lunch.id)
+        )
+        self.assertEqual(updated.total_calories, 1000)
+        created = MealPlan.objects.get(account=self.account, date="2025-03-02")
+        self.assertEqual(created.dinner_id, dinner.id)
+        self.assertEqual(created.total_calories, 800)
+        self.assertEqual(MealPlan.objects.filter(account=self.account).count(), 2)
+
+
+class MealPlanConditionalGetTests(MealPlanViewTestCase):
+    url = "/api/v1/meals/plan/?date=2025-03-01"
+
+    def test_if_none_match_returns_304_until_the_plan_changes(self):
+        breakfast, lunch, dinner = self.recipes
+        self.client.post(
+            "/api/v1/meals/plan/",
+            {"date": "2025-03-01", "breakfast_id": breakfast.id},
+            format="json",
+        )
+
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers["ETag"]
+
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.client.post(
+            "/api/v1/meals/plan/",
+            {"date": "2025-03-01", "lunch_id": lunch.id},
+            format="json",
+        )
+
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], etag)
+
+
+class WarmRecipeCacheCommandTests(TestCase):
+    def test_refuses_a_per_process_cache(self):
+        # The test settings use the default LocMemCache
+        with self.assertRaises(CommandError):
+            call_command("warm_recipe_cache")
@@ -1,8 +1,28 @@
 from django.urls import path
-from .views import MealSuggestionsView, MealPlanView, RecipeDetailView
+from .views import (
+    MealSuggestionsView,
+    MealSuggestionsAsyncView,
+    MealPlanView,
+    MealPlanRangeView,
+    MealPlanBulkView,
+    MealPlanSummaryView,
+    MealPlanOptimizeView,
+    MealPlanWeekView,
+    RecipeDetailView,
+)
 
 urlpatterns = [
     path("suggestions/", MealSuggestionsView.as_view(), name="meal-suggestions"),
+    path(
+        "suggestions/async/",
+        MealSuggestionsAsyncView.as_view(),
+        name="meal-suggestions-async",
+    ),
     path("plan/", MealPlanView.as_view(), name="meal-plan"),
+    path("plan/range/", MealPlanRangeView.as_view(), name="meal-plan-range"),
+    path("plan/bulk/", MealPlanBulkView.as_view(), name="meal-plan-bulk"),
+    path("plan/summary/", MealPlanSummaryView.as_view(), name="meal-plan-summary"),
+    path("plan/optimize/", MealPlanOptimizeView.as_view(), name="meal-plan-optimize"),
+    path("plan/week/", MealPlanWeekView.as_view(), name="meal-plan-week"),
     path("recipe/<int:recipe_id>/", RecipeDetailView.as_view(), name="recipe-detail"),
 ]
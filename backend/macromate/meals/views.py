@@ -3,14 +3,29 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.authentication import TokenAuthentication
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
-from datetime import date
+from datetime import date, datetime
 import json
 
+from .cache import recipe_cache, recipe_cache_key
+from .freshness import refresh_if_stale
 from .models import MealPlan, Recipe
 from meal_planning.models import MacroGoal
+from macromate.async_views import AsyncAuthenticatedView
+from macromate.conditional import (
+    make_etag,
+    not_modified,
+    request_variant,
+    set_validators,
+)
 from .services import MealPlannerService
-from .serializers import MealPlanSerializer
+from .serializers import (
+    MealPlanSerializer,
+    get_deferred_recipe_fields,
+    get_requested_recipe_fields,
+    recipe_detail_cache_entry,
+)
 
 
 class AuthenticatedAPIView(APIView):
@@ -22,6 +37,21 @@ class AuthenticatedAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
 
+def meal_plan_queryset(recipe_fields):
+    """
+    MealPlans with their three recipes joined in, skipping the heavy recipe
+    columns that aren't in recipe_fields
+    """
+    deferred = get_deferred_recipe_fields(recipe_fields)
+    return MealPlan.objects.select_related("breakfast", "lunch", "dinner").defer(
+        *[
+            f"{meal}__{field}"
+            for meal in ["breakfast", "lunch", "dinner"]
+            for field in deferred
+        ]
+    )
+
+
 class MealSuggestionsView(AuthenticatedAPIView):
     """
     API endpoint to get meal suggestions based on user's macro goals
@@ -42,8 +72,11 @@ class MealSuggestionsView(AuthenticatedAPIView):
                     status=s.HTTP_400_BAD_REQUEST,
                 )
 
+            # Optional ?view=compact or ?fields=... to trim each recipe
+            recipe_fields = get_requested_recipe_fields(request.query_params)
+
             # Create our meal planning service with the user's goals
-            planner = MealPlannerService(macro_goals)
+            planner = MealPlannerService(macro_goals, recipe_fields=recipe_fields)
 
             # Check if they want suggestions for a specific meal or all meals
             meal_type = request.query_params.get("meal_type")
@@ -55,15 +88,7 @@ class MealSuggestionsView(AuthenticatedAPIView):
 
             # Return the suggestions along with the user's daily goals
             return Response(
-                {
-                    "suggestions": suggestions,
-                    "daily_goals": {
-                        "calories": macro_goals.calories,
-                        "proteins": macro_goals.proteins,
-                        "fats": macro_goals.fats,
-                        "carbohydrates": macro_goals.carbohydrates,
-                    },
-                }
+                suggestions_payload(suggestions, recipe_fields, macro_goals, planner)
             )
 
         except Exception as e:
@@ -73,17 +98,99 @@ class MealSuggestionsView(AuthenticatedAPIView):
             )
 
 
+class MealSuggestionsAsyncView(AsyncAuthenticatedView):
+    """
+    Async (ASGI) version of MealSuggestionsView
+
+    Same query parameters and response. The Spoonacular calls are awaited
+    instead of blocking a worker thread, so one worker can serve many
+    suggestion requests that are waiting on the upstream API.
+    """
+
+    async def get(self, request):
+        """Handle GET requests to fetch meal suggestions"""
+        try:
+            macro_goals = (
+                await MacroGoal.objects.filter(account=request.user)
+                .order_by("-id")
+                .afirst()
+            )
+
+            if not macro_goals:
+                return JsonResponse(
+                    {
+                        "error": "Please set your macro goals first before getting meal suggestions."
+                    },
+                    status=s.HTTP_400_BAD_REQUEST,
+                )
+
+            recipe_fields = get_requested_recipe_fields(request.GET)
+            planner = MealPlannerService(macro_goals, recipe_fields=recipe_fields)
+
+            meal_type = request.GET.get("meal_type")
+
+            if meal_type and meal_type in ["breakfast", "lunch", "dinner"]:
+                suggestions = {meal_type: await planner.afetch_meal_options(meal_type)}
+            else:
+                suggestions = await planner.aget_all_meal_options()
+
+            return JsonResponse(
+                suggestions_payload(suggestions, recipe_fields, macro_goals, planner)
+            )
+
+        except Exception as e:
+            return JsonResponse(
+                {"error": f"Error fetching meal suggestions: {str(e)}"},
+                status=s.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+def suggestions_payload(suggestions, recipe_fields, macro_goals, planner):
+    """Build the suggestions response body (shared by the sync and async views)"""
+    if recipe_fields is not None:
+        suggestions = {
+            meal: [
+                {field: recipe[field] for field in recipe_fields if field in recipe}
+                for recipe in recipes
+            ]
+            for meal, recipes in suggestions.items()
+        }
+
+    return {
+        "suggestions": suggestions,
+        "daily_goals": {
+            "calories": macro_goals.calories,
+            "proteins": macro_goals.proteins,
+            "fats": macro_goals.fats,
+            "carbohydrates": macro_goals.carbohydrates,
+        },
+        # Seconds spent per meal (only filled when fetching all meals)
+        "timings": planner.meal_timings,
+    }
+
+
 class MealPlanView(AuthenticatedAPIView):
     """
     API endpoint to manage meal plans
     """
 
     def get(self, request):
-        """Get user's meal plan for a specific date"""
+        """
+        Get user's meal plan for a specific date
+        Optional ?view=compact or ?fields=... to trim each recipe
+        """
         target_date = request.query_params.get("date", str(date.today()))
+        recipe_fields = get_requested_recipe_fields(request.query_params)
 
         try:
-            meal_plan = MealPlan.objects.get(account=request.user, date=target_date)
+            # Cheap columns only - enough to tell if the client's copy is current
+            versions = MealPlan.objects.values_list(
+                "id",
+                "updated_at",
+                "breakfast__updated_at",
+                "lunch__updated_at",
+                "dinner__updated_at",
+            ).get(account=request.user, date=target_date)
 
             # FIXED: Get most recent macro goal instead of using .get()
             macro_goals = (
@@ -96,23 +203,37 @@ class MealPlanView(AuthenticatedAPIView):
                     status=s.HTTP_400_BAD_REQUEST,
                 )
 
-            planner = MealPlannerService(macro_goals)
+            # The goal is part of the response too (percentages in the totals)
+            etag = make_etag(
+                *versions,
+                macro_goals.id,
+                macro_goals.updated_at,
+                request_variant(request),
+            )
+            last_modified = max(
+                value for value in [*versions[1:], macro_goals.updated_at] if value
+            )
+            cached_response = not_modified(request, etag, last_modified)
+            if cached_response is not None:
+                return cached_response
 
-            # Calculate total nutrition for all selected meals
-            meal_totals = planner.calculate_meal_totals(
-                breakfast_id=meal_plan.breakfast.id if meal_plan.breakfast else None,
-                lunch_id=meal_plan.lunch.id if meal_plan.lunch else None,
-                dinner_id=meal_plan.dinner.id if meal_plan.dinner else None,
+            meal_plan = meal_plan_queryset(recipe_fields).get(
+                account=request.user, date=target_date
             )
 
+            planner = MealPlannerService(macro_goals)
+
+            # Total nutrition for all selected meals (stored on the meal plan)
+            meal_totals = planner.get_plan_totals(meal_plan)
+
             # Convert meal plan object to JSON format for API response
-            serializer = MealPlanSerializer(meal_plan)
+            serializer = MealPlanSerializer(meal_plan, recipe_fields=recipe_fields)
             response_data = serializer.data
 
             # Add the calculated nutrition totals to the response
             response_data["totals"] = meal_totals
 
-            return Response(response_data)
+            return set_validators(Response(response_data), etag, last_modified)
 
         except MealPlan.DoesNotExist:
             return Response(
@@ -126,12 +247,17 @@ class MealPlanView(AuthenticatedAPIView):
             )
 
     def post(self, request):
-        """Create or update a meal plan with user's selected recipes"""
+        """
+        Create or update a meal plan with user's selected recipes
+        Optional ?view=compact or ?fields=... to trim each recipe in the response
+        """
         target_date = request.data.get("date", str(date.today()))
+        recipe_fields = get_requested_recipe_fields(request.query_params)
+        recipes = Recipe.objects.defer(*get_deferred_recipe_fields(recipe_fields))
 
         try:
             # Get existing meal plan OR create a new one for this date
-            meal_plan, created = MealPlan.objects.get_or_create(
+            meal_plan, created = meal_plan_queryset(recipe_fields).get_or_create(
                 account=request.user,
                 date=target_date,
             )
@@ -139,18 +265,21 @@ class MealPlanView(AuthenticatedAPIView):
             # Update selected meals based on what user sent in request
             if "breakfast_id" in request.data:
                 meal_plan.breakfast = get_object_or_404(
-                    Recipe, id=request.data["breakfast_id"]
+                    recipes, id=request.data["breakfast_id"]
                 )
 
             if "lunch_id" in request.data:
-                meal_plan.lunch = get_object_or_404(Recipe, id=request.data["lunch_id"])
+                meal_plan.lunch = get_object_or_404(
+                    recipes, id=request.data["lunch_id"]
+                )
 
             if "dinner_id" in request.data:
                 meal_plan.dinner = get_object_or_404(
-                    Recipe, id=request.data["dinner_id"]
+                    recipes, id=request.data["dinner_id"]
                 )
 
-            # Save the updated meal plan to database
+            # Save the updated meal plan (and its daily totals) to database
+            meal_plan.refresh_totals()
             meal_plan.save()
 
             # FIXED: Get most recent macro goal instead of using .get()
@@ -166,15 +295,11 @@ class MealPlanView(AuthenticatedAPIView):
 
             planner = MealPlannerService(macro_goals)
 
-            # Calculate totals from all selected meals
-            meal_totals = planner.calculate_meal_totals(
-                breakfast_id=meal_plan.breakfast.id if meal_plan.breakfast else None,
-                lunch_id=meal_plan.lunch.id if meal_plan.lunch else None,
-                dinner_id=meal_plan.dinner.id if meal_plan.dinner else None,
-            )
+            # Totals from all selected meals
+            meal_totals = planner.get_plan_totals(meal_plan)
 
             # Prepare response with meal plan data and nutrition totals
-            serializer = MealPlanSerializer(meal_plan)
+            serializer = MealPlanSerializer(meal_plan, recipe_fields=recipe_fields)
             response_data = serializer.data
             response_data["totals"] = meal_totals
 
@@ -187,34 +312,372 @@ class MealPlanView(AuthenticatedAPIView):
             )
 
 
+class MealPlanRangeView(AuthenticatedAPIView):
+    """
+    API endpoint to list the user's meal plans over a date range (calendar / My Meals)
+    """
+
+    def get(self, request):
+        """
+        List meal plans with their recipes and totals, one page at a time
+
+        Query params:
+        - start_date / end_date: YYYY-MM-DD (end_date defaults to start_date)
+        - after: date of the last plan on the previous page (from next_after)
+        - limit: plans per page (default 31, max 100)
+        - view=compact or fields=...: trim each recipe like MealPlanView
+
+        Always two queries (goal + one joined page) however long the range is.
+        """
+        start_date = request.query_params.get("start_date")
+        end_date = request.query_params.get("end_date", start_date)
+        after = request.query_params.get("after")
+
+        if not start_date:
+            return Response(
+                {"error": "start_date is required"}, status=s.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+            end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+            if after:
+                after = datetime.strptime(after, "%Y-%m-%d").date()
+            limit = min(max(int(request.query_params.get("limit", 31)), 1), 100)
+        except ValueError:
+            return Response(
+                {"error": "Invalid date format (use YYYY-MM-DD) or limit"},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        macro_goals = (
+            MacroGoal.objects.filter(account=request.user).order_by("-id").first()
+        )
+
+        if not macro_goals:
+            return Response(
+                {"error": "Please set your macro goals first."},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        recipe_fields = get_requested_recipe_fields(request.query_params)
+
+        meal_plans = meal_plan_queryset(recipe_fields).filter(
+            account=request.user, date__gte=start_date, date__lte=end_date
+        )
+        # Keyset pagination: continue after the last date we sent
+        if after:
+            meal_plans = meal_plans.filter(date__gt=after)
+
+        # Fetch one extra row to know whether there is another page
+        page = list(meal_plans.order_by("date")[: limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        planner = MealPlannerService(macro_goals)
+        results = []
+        for meal_plan in page:
+            plan_data = MealPlanSerializer(meal_plan, recipe_fields=recipe_fields).data
+            # Totals come from the same row, no extra queries
+            plan_data["totals"] = planner.get_plan_totals(meal_plan)
+            results.append(plan_data)
+
+        return Response(
+            {
+                "results": results,
+                "next_after": page[-1].date if has_more else None,
+            }
+        )
+
+
+class MealPlanBulkView(AuthenticatedAPIView):
+    """
+    API endpoint to create or update meal plans for many dates in one request
+    """
+
+    def post(self, request):
+        """
+        Save several meal plans at once
+
+        Body: {"plans": [{"date": "YYYY-MM-DD", "breakfast_id": 1, "lunch_id": 2,
+        "dinner_id": 3}, ...]} - meal IDs are optional like in MealPlanView.post
+        """
+        entries = request.data.get("plans")
+
+        if not isinstance(entries, list) or not entries:
+            return Response(
+                {"error": "plans must be a non-empty list"},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        if len(entries) > 366:
+            return Response(
+                {"error": "At most 366 plans can be saved at once"},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        parsed_entries = []
+        try:
+            for entry in entries:
+                parsed = {"date": datetime.strptime(entry["date"], "%Y-%m-%d").date()}
+                for slot in ["breakfast_id", "lunch_id", "dinner_id"]:
+                    if slot in entry:
+                        parsed[slot] = (
+                            int(entry[slot]) if entry[slot] is not None else None
+                        )
+                parsed_entries.append(parsed)
+        except (KeyError, TypeError, ValueError):
+            return Response(
+                {"error": "Each plan needs a YYYY-MM-DD date and numeric meal IDs"},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        if len({entry["date"] for entry in parsed_entries}) != len(parsed_entries):
+            return Response(
+                {"error": "Each date can only appear once"},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        macro_goals = (
+            MacroGoal.objects.filter(account=request.user).order_by("-id").first()
+        )
+
+        if not macro_goals:
+            return Response(
+                {"error": "Please set your macro goals first."},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            planner = MealPlannerService(macro_goals)
+            plans = planner.bulk_upsert_meal_plans(request.user, parsed_entries)
+            return Response({"plans": plans}, status=s.HTTP_200_OK)
+
+        except ValueError as e:
+            return Response({"error": str(e)}, status=s.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {"error": f"Error updating meal plans: {str(e)}"},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+
+class MealPlanSummaryView(AuthenticatedAPIView):
+    """
+    API endpoint for nutrition totals over a date range (e.g. monthly history)
+    """
+
+    def get(self, request):
+        """
+        Get per-day and whole-period totals with goal percentages
+
+        Query params: start_date and end_date (YYYY-MM-DD, end_date defaults
+        to start_date)
+        """
+        start_date = request.query_params.get("start_date")
+        end_date = request.query_params.get("end_date", start_date)
+
+        if not start_date:
+            return Response(
+                {"error": "start_date is required"}, status=s.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+            end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+        except ValueError:
+            return Response(
+                {"error": "Invalid date format. Use YYYY-MM-DD"},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        macro_goals = (
+            MacroGoal.objects.filter(account=request.user).order_by("-id").first()
+        )
+
+        if not macro_goals:
+            return Response(
+                {"error": "Please set your macro goals first."},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            planner = MealPlannerService(macro_goals)
+            return Response(
+                planner.get_range_totals(request.user, start_date, end_date)
+            )
+        except Exception as e:
+            return Response(
+                {"error": f"Error calculating meal plan totals: {str(e)}"},
+                status=s.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class MealPlanOptimizeView(AuthenticatedAPIView):
+    """
+    API endpoint to find the breakfast+lunch+dinner combinations that best hit
+    the user's daily macro goals
+    """
+
+    def post(self, request):
+        """
+        Optimize a day's meals
+
+        Optional body fields:
+        - breakfast_ids / lunch_ids / dinner_ids: recipe IDs to choose from
+          (defaults to the best-fitting cached recipes for that meal)
+        - top_n: how many plans to return (default 5, max 50)
+        - pool_size: candidates per meal when using cached recipes (default 200, max 500)
+        """
+        macro_goals = (
+            MacroGoal.objects.filter(account=request.user).order_by("-id").first()
+        )
+
+        if not macro_goals:
+            return Response(
+                {"error": "Please set your macro goals first."},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            top_n = min(max(int(request.data.get("top_n", 5)), 1), 50)
+            pool_size = min(max(int(request.data.get("pool_size", 200)), 1), 500)
+            candidate_ids = {
+                meal_type: [
+                    int(recipe_id) for recipe_id in request.data[f"{meal_type}_ids"]
+                ]
+                for meal_type in ["breakfast", "lunch", "dinner"]
+                if request.data.get(f"{meal_type}_ids")
+            }
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "top_n, pool_size and recipe IDs must be numbers"},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            planner = MealPlannerService(macro_goals)
+            plans = planner.optimize_day_plans(
+                candidate_ids=candidate_ids, top_n=top_n, pool_size=pool_size
+            )
+            return Response({"plans": plans, "daily_goals": planner.daily_goals})
+
+        except ValueError as e:
+            return Response({"error": str(e)}, status=s.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response(
+                {"error": f"Error optimizing meal plan: {str(e)}"},
+                status=s.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class MealPlanWeekView(AuthenticatedAPIView):
+    """
+    API endpoint to generate meal plans for a week (or any number of days) at once
+    """
+
+    def post(self, request):
+        """
+        Generate and save meal plans for several days
+
+        Optional body fields:
+        - start_date: first day to plan, YYYY-MM-DD (default today)
+        - days: how many days to plan (default 7, max 31)
+        """
+        try:
+            start_date = datetime.strptime(
+                request.data.get("start_date", str(date.today())), "%Y-%m-%d"
+            ).date()
+            days = int(request.data.get("days", 7))
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "Invalid start_date or days. Use YYYY-MM-DD and a number"},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        if not 1 <= days <= 31:
+            return Response(
+                {"error": "days must be between 1 and 31"},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        macro_goals = (
+            MacroGoal.objects.filter(account=request.user).order_by("-id").first()
+        )
+
+        if not macro_goals:
+            return Response(
+                {"error": "Please set your macro goals first."},
+                status=s.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            planner = MealPlannerService(macro_goals)
+            plans = planner.generate_week_plan(request.user, start_date, days)
+
+            if not plans:
+                return Response(
+                    {"error": "Not enough recipes found to plan these days"},
+                    status=s.HTTP_404_NOT_FOUND,
+                )
+
+            return Response(
+                {"plans": plans, "daily_goals": planner.daily_goals},
+                status=s.HTTP_201_CREATED,
+            )
+
+        except Exception as e:
+            return Response(
+                {"error": f"Error generating meal plans: {str(e)}"},
+                status=s.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
 class RecipeDetailView(AuthenticatedAPIView):
     """
     API endpoint to get detailed information about a specific recipe
     """
 
     def get(self, request, recipe_id):
-        """Get detailed information about a specific recipe"""
+        """
+        Get detailed information about a specific recipe
+        Optional ?view=compact or ?fields=... to only return some fields
+        """
+        recipe_fields = get_requested_recipe_fields(request.query_params)
+
         try:
-            recipe = Recipe.objects.get(id=recipe_id)
-
-            recipe_data = {
-                "id": recipe.id,
-                "spoonacular_id": recipe.spoonacular_id,
-                "title": recipe.title,
-                "image": recipe.image,
-                "ready_in_minutes": recipe.ready_in_minutes,
-                "servings": recipe.servings,
-                "calories": recipe.calories,
-                "proteins": recipe.proteins,
-                "fats": recipe.fats,
-                "carbohydrates": recipe.carbohydrates,
-                "summary": recipe.summary,
-                "instructions": recipe.instructions,
-                "ingredients": recipe.ingredients,
-                "meal_type": recipe.meal_type,
-            }
+            # The recipe's version comes from one primary-key lookup, so a 304 or a
+            # cache hit never loads the heavy columns
+            spoonacular_id, updated_at, fetched_at = Recipe.objects.values_list(
+                "spoonacular_id", "updated_at", "fetched_at"
+            ).get(id=recipe_id)
+
+            # A stale recipe is still served, and refreshed in the background
+            refresh_if_stale([(spoonacular_id, fetched_at)])
+
+            etag = make_etag(recipe_id, updated_at, request_variant(request))
+            cached_response = not_modified(request, etag, updated_at)
+            if cached_response is not None:
+                return cached_response
+
+            # Recipes are shared by every user, so each version is serialized once
+            # and then served from the cache
+            cache_key = recipe_cache_key(recipe_id, updated_at)
+            recipe_data = recipe_cache.get(cache_key)
+            if recipe_data is None:
+                recipe = Recipe.objects.defer(*get_deferred_recipe_fields(None)).get(
+                    id=recipe_id
+                )
+                recipe_data = recipe_detail_cache_entry(recipe)
+                recipe_cache.set(
+                    recipe_cache_key(recipe.id, recipe.updated_at), recipe_data
+                )
+
+            # The full recipe is cached - trim it for ?view=compact / ?fields=
+            if recipe_fields is not None:
+                recipe_data = {field: recipe_data[field] for field in recipe_fields}
 
-            return Response(recipe_data)
+            return set_validators(Response(recipe_data), etag, updated_at)
 
         except Recipe.DoesNotExist:
             return Response({"error": "Recipe not found"}, status=s.HTTP_404_NOT_FOUND)